@@ -0,0 +1,95 @@
+"""Measures the time to load a reference file and build the GDScript classes.
+
+Generates a synthetic project, writes it as JSON and newline-delimited JSON, and
+reports the best time out of several runs for each loading step.
+
+Usage: python benchmark_loading.py --classes 3000 --repeat 3
+"""
+import argparse
+import copy
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, List, Tuple
+
+from gdscript_docs_maker import reference_file
+from gdscript_docs_maker.gdscript_objects import GDScriptClasses
+
+import synthetic_reference
+
+
+def measure(
+    function: Callable[[Any], object], repeat: int, setup: Callable[[], Any] = None
+) -> float:
+    """Returns the shortest run time of `function` in seconds. If `setup` is set,
+    calls it before every run, untimed, and passes its result to `function`."""
+    best: float = float("inf")
+    for _ in range(repeat):
+        argument: Any = setup() if setup else None
+        start: float = time.perf_counter()
+        function(argument)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(args: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-c", "--classes", type=int, default=3000)
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    namespace: argparse.Namespace = parser.parse_args(args)
+
+    project: dict = synthetic_reference.make_project(namespace.classes, namespace.seed)
+    with tempfile.TemporaryDirectory() as dirpath:
+        json_path: str = os.path.join(dirpath, "reference.json")
+        ndjson_path: str = os.path.join(dirpath, "reference.ndjson")
+        synthetic_reference.write_project(project, json_path)
+        synthetic_reference.write_project(project, ndjson_path, ndjson=True)
+        print(
+            "{} classes, {:.1f} MB of JSON".format(
+                namespace.classes, os.path.getsize(json_path) / 1024**2
+            )
+        )
+
+        # Earlier versions of the loader modified the dictionaries they built classes
+        # from: work on copies to compare revisions.
+        def copy_classes() -> List[dict]:
+            return copy.deepcopy(project["classes"])
+
+        def build(data: List[dict]) -> None:
+            gc.disable()
+            try:
+                GDScriptClasses.from_dict_list(data)
+            finally:
+                gc.enable()
+
+        def decode(_) -> None:
+            with open(json_path, "r") as file_in:
+                json.loads(file_in.read())
+
+        repeat: int = namespace.repeat
+        results: List[Tuple[str, float]] = [
+            ("decode JSON", measure(decode, repeat)),
+            ("build classes", measure(build, repeat, copy_classes)),
+            (
+                "build classes, gc enabled",
+                measure(GDScriptClasses.from_dict_list, repeat, copy_classes),
+            ),
+            (
+                "load JSON file",
+                measure(lambda _: reference_file.load(json_path), repeat),
+            ),
+            (
+                "load NDJSON file",
+                measure(lambda _: reference_file.load(ndjson_path), repeat),
+            ),
+        ]
+    for label, seconds in results:
+        print("{:<28}{:>8.3f} s".format(label, seconds))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,51 @@
+"""Measures the memory the GDScript object model takes per class.
+
+Generates a synthetic project, decodes it, builds the classes, drops the decoded
+dictionaries, and reports the memory still allocated, traced with tracemalloc.
+
+Usage: python benchmark_memory.py --classes 3000
+"""
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from typing import List
+
+from gdscript_docs_maker.gdscript_objects import GDScriptClasses
+
+import synthetic_reference
+
+
+def measure_model_size(text: str) -> int:
+    """Returns the number of bytes allocated by the classes built from the JSON
+    reference `text`."""
+    gc.collect()
+    tracemalloc.start()
+    data: dict = json.loads(text)
+    classes: GDScriptClasses = GDScriptClasses.from_dict_list(data["classes"])
+    del data
+    gc.collect()
+    size: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del classes
+    return size
+
+
+def main(args: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-c", "--classes", type=int, default=3000)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    namespace: argparse.Namespace = parser.parse_args(args)
+
+    text: str = json.dumps(
+        synthetic_reference.make_project(namespace.classes, namespace.seed)
+    )
+    size: int = measure_model_size(text)
+    print("{} classes, {:.1f} MB of JSON".format(namespace.classes, len(text) / 1e6))
+    print("{:<20}{:>10.1f} MB".format("model size", size / 1e6))
+    print("{:<20}{:>10.0f} bytes".format("per class", size / namespace.classes))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
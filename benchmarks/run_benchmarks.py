@@ -0,0 +1,207 @@
+"""Times every stage of the conversion on synthetic projects of increasing size, and
+records the results to a JSON file to compare versions of GDScript Docs Maker.
+
+The stages are:
+
+- load: reading and decoding the JSON reference file.
+- build: building the GDScriptClasses from the decoded dictionaries.
+- convert: converting the classes to markdown documents.
+- save: writing the documents to an empty output directory with `OutputSync`.
+
+Usage: python run_benchmarks.py --sizes 100 1000 -o results.json --compare old.json
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import pkg_resources
+
+from gdscript_docs_maker.command_line import OutputFormats
+from gdscript_docs_maker.config import LOGGER
+from gdscript_docs_maker.convert_to_markdown import convert_to_markdown
+from gdscript_docs_maker.gdscript_objects import GDScriptClasses, ProjectInfo
+from gdscript_docs_maker.make_markdown import MarkdownDocument
+from gdscript_docs_maker.sync import OutputSync
+
+import synthetic_reference
+
+DEFAULT_SIZES: List[int] = [100, 1000, 10000, 50000]
+STAGES: List[str] = ["load", "build", "convert", "save"]
+
+
+def run(
+    class_count: int, options: dict, output_format: OutputFormats, repeat: int
+) -> Dict[str, Any]:
+    """Generates a project with `class_count` classes and returns the shortest time
+    of each stage out of `repeat` runs, in seconds."""
+    project: dict = synthetic_reference.make_project(class_count, **options)
+    arguments: argparse.Namespace = argparse.Namespace(
+        format=output_format,
+        formats=[output_format],
+        make_index=False,
+        reverse_references=False,
+        templates="",
+        author="benchmark",
+        date=datetime.date(2020, 1, 1),
+    )
+    result: Dict[str, Any] = {"classes": class_count}
+    times: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    with tempfile.TemporaryDirectory() as dirpath:
+        path: str = os.path.join(dirpath, "reference.json")
+        synthetic_reference.write_project(project, path)
+        del project
+        result["json_size"] = os.path.getsize(path)
+
+        for index in range(repeat):
+            data: dict = _timed(times["load"], _load, path)
+            classes: GDScriptClasses = _timed(
+                times["build"], GDScriptClasses.from_dict_list, data["classes"]
+            )
+            info: ProjectInfo = ProjectInfo.from_dict(data)
+            del data
+            documents: List[MarkdownDocument] = _timed(
+                times["convert"], convert_to_markdown, classes, arguments, info
+            )
+            del classes
+            output_path: str = os.path.join(dirpath, "output{}".format(index))
+            os.mkdir(output_path)
+            _timed(times["save"], _save, documents, output_path)
+            result["documents"] = len(documents)
+            del documents
+
+    result.update({stage: min(values) for stage, values in times.items()})
+    return result
+
+
+def compare(results: List[dict], previous: List[dict]) -> None:
+    """Prints the ratio between the times in `results` and the ones in `previous`
+    for the project sizes both contain."""
+    previous_by_size: Dict[int, dict] = {entry["classes"]: entry for entry in previous}
+    print("\nCompared to the previous results (new time / old time):")
+    for entry in results:
+        old: Optional[dict] = previous_by_size.get(entry["classes"])
+        if not old:
+            continue
+        ratios: List[str] = [
+            "{} {:.2f}x".format(stage, entry[stage] / old[stage])
+            for stage in STAGES
+            if old.get(stage)
+        ]
+        print("{:>7} classes: {}".format(entry["classes"], ", ".join(ratios)))
+
+
+def get_version() -> str:
+    """Returns the installed version of the package, followed by the git revision
+    when the benchmarks run from a git repository."""
+    try:
+        version: str = pkg_resources.get_distribution("gdscript_docs_maker").version
+    except pkg_resources.DistributionNotFound:
+        version = "unknown"
+    try:
+        revision: str = subprocess.check_output(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+        ).strip()
+        version += "+" + revision
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return version
+
+
+def _load(path: str) -> dict:
+    with open(path, "r") as json_file:
+        return json.loads(json_file.read())
+
+
+def _save(documents: List[MarkdownDocument], dirpath: str) -> None:
+    output: OutputSync = OutputSync(dirpath)
+    for document in documents:
+        output.write(document.get_filename(), document.as_string())
+    output.finish()
+
+
+def _timed(times: List[float], function: Callable[..., Any], *args: Any) -> Any:
+    """Calls `function` with `args`, appends its run time to `times`, and returns its
+    result."""
+    start: float = time.perf_counter()
+    value: Any = function(*args)
+    times.append(time.perf_counter() - start)
+    return value
+
+
+def main(args: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="Numbers of classes of the projects to benchmark.",
+    )
+    parser.add_argument("-r", "--repeat", type=int, default=1)
+    parser.add_argument(
+        "-f",
+        "--format",
+        type=OutputFormats,
+        default=OutputFormats.MARDKOWN,
+        help="Output format, either markdown or hugo.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="benchmark_results.json",
+        help="Path of the JSON file to write the results to.",
+    )
+    parser.add_argument(
+        "--compare", help="Path of previous results to compare the new ones with."
+    )
+    synthetic_reference.add_generator_arguments(parser)
+    namespace: argparse.Namespace = parser.parse_args(args)
+
+    # Invalid references in the synthetic projects log thousands of warnings.
+    LOGGER.setLevel(logging.ERROR)
+    options: dict = synthetic_reference.get_generator_options(namespace)
+    options["seed"] = namespace.seed
+
+    results: List[dict] = []
+    print("{:>7} {:>9} {:>9} {:>9} {:>9}".format("classes", *STAGES))
+    for size in namespace.sizes:
+        result: dict = run(size, options, namespace.format, namespace.repeat)
+        results.append(result)
+        print(
+            "{:>7} {:>8.3f}s {:>8.3f}s {:>8.3f}s {:>8.3f}s".format(
+                size, *(result[stage] for stage in STAGES)
+            )
+        )
+
+    report: dict = {
+        "version": get_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "format": namespace.format.value,
+        "repeat": namespace.repeat,
+        "generator": options,
+        "results": results,
+    }
+    with open(namespace.output, "w") as file_out:
+        json.dump(report, file_out, indent=2)
+    print("Results saved to " + namespace.output)
+
+    if namespace.compare:
+        with open(namespace.compare, "r") as file_in:
+            compare(results, json.load(file_in)["results"])
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
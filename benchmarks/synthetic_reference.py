@@ -0,0 +1,352 @@
+"""Generates synthetic reference files, shaped like the output of the Godot collector
+scripts, to benchmark GDScript Docs Maker on projects of any size.
+
+The output only depends on the arguments: the same seed produces the same project.
+
+Usage: python synthetic_reference.py 10000 -o reference.json
+"""
+import argparse
+import json
+import random
+import sys
+from typing import List
+
+TYPES: List[str] = [
+    "int",
+    "float",
+    "String",
+    "bool",
+    "Vector2",
+    "Vector3",
+    "Array",
+    "Dictionary",
+    "Node",
+    "Object",
+]
+WORDS: List[str] = (
+    "the agent moves towards target with a speed and acceleration that is clamped by "
+    "the maximum value of this property when it updates each frame"
+).split()
+
+
+class ProjectGenerator:
+    """Builds the dictionary of a synthetic project with `class_count` classes.
+
+    Arguments:
+
+    - members: number of properties and of methods per class.
+    - description_lines: number of lines in class descriptions. Method descriptions
+      have half as many lines, and other descriptions a quarter.
+    - link_density: probability for a description line to contain a reference to a
+      class or a symbol. Some of the references are invalid.
+    - depth: maximum number of ancestors from the project a class can have. Most
+      classes extend a class defined a few classes before them.
+    - sub_classes: number of inner classes per class.
+    - sub_class_depth: number of levels of nested inner classes.
+
+    """
+
+    def __init__(
+        self,
+        class_count: int,
+        seed: int = 0,
+        members: int = 6,
+        description_lines: int = 4,
+        link_density: float = 0.6,
+        depth: int = 4,
+        sub_classes: int = 1,
+        sub_class_depth: int = 1,
+    ):
+        self.random: random.Random = random.Random(seed)
+        self.members: int = members
+        self.description_lines: int = description_lines
+        self.link_density: float = link_density
+        self.depth: int = depth
+        self.sub_classes: int = sub_classes
+        self.sub_class_depth: int = sub_class_depth
+        self.names: List[str] = ["Class{}Agent".format(i) for i in range(class_count)]
+        # Number of ancestors from the project of each generated class.
+        self.depths: List[int] = []
+
+    def make_project(self) -> dict:
+        return {
+            "name": "Synthetic project",
+            "description": "A generated project with {} classes".format(
+                len(self.names)
+            ),
+            "version": "1.0",
+            "classes": [
+                self.make_class(name, index) for index, name in enumerate(self.names)
+            ],
+        }
+
+    def make_class(self, name: str, index: int, level: int = 0) -> dict:
+        """Returns the dictionary of the class at `index` in the project, or of one of
+        its inner classes if `level` is greater than 0."""
+        rnd: random.Random = self.random
+        symbols: List[str] = []
+        if level == 0:
+            symbols = ["m_{}".format(k) for k in range(self.members)] + [
+                "f_{}".format(k) for k in range(self.members)
+            ]
+        short_description_lines: int = max(1, self.description_lines // 4)
+
+        description: str = self.make_description(symbols, self.description_lines)
+        if rnd.random() < 0.3:
+            description += "\n@category Category {}".format(rnd.randint(0, 3))
+        if rnd.random() < 0.1:
+            description = "@tags abstract, agent\n" + description
+
+        extends: List[str] = []
+        if level == 0:
+            parent: int = max(0, index - rnd.randint(1, 4))
+            if index > 0 and rnd.random() < 0.8 and self.depths[parent] < self.depth:
+                extends = [self.names[parent]]
+                self.depths.append(self.depths[parent] + 1)
+            else:
+                self.depths.append(0)
+        if not extends and rnd.random() < 0.5:
+            extends = ["Node"]
+
+        methods: List[dict] = [
+            self.make_method(k, symbols) for k in range(self.members)
+        ] + [
+            _make_method_data("_ready", [], "null", ""),
+            _make_method_data("_init", [{"name": "x", "type": "int"}], "null", "Ctor"),
+            _make_method_data("_private", [], "null", "Hidden"),
+        ]
+        constants: List[dict] = [
+            {
+                "name": "C_{}".format(k),
+                "value": k,
+                "data_type": "int",
+                "signature": "const C_{} = {}".format(k, k),
+                "description": self.make_description(symbols, short_description_lines),
+            }
+            for k in range(2)
+        ] + [
+            _make_constant_data("Mode", {"A": 0, "B": 1}, "enum Mode {A, B}", "Modes"),
+            _make_constant_data("_Private", {"A": 0}, "enum _Private {A}", ""),
+            _make_constant_data("TABLE", {"A": "x"}, "const TABLE = {}", "Table"),
+        ]
+        rnd.shuffle(constants)
+
+        sub_classes: List[dict] = []
+        if level < self.sub_class_depth:
+            sub_classes = [
+                self.make_class("Inner{}".format(k), index, level + 1)
+                for k in range(self.sub_classes)
+            ]
+
+        return {
+            "name": name,
+            "path": "res://src/{}.gd".format(name),
+            "extends_class": extends,
+            "extends_file": "",
+            "icon": "",
+            "signature": "class {}".format(name),
+            "description": description,
+            "sub_classes": sub_classes,
+            "constants": constants,
+            "members": [self.make_member(k, symbols) for k in range(self.members)]
+            + [
+                {
+                    "name": "_hidden",
+                    "data_type": "int",
+                    "default_value": 0,
+                    "setter": "",
+                    "getter": "",
+                    "export": False,
+                    "signature": "var _hidden",
+                    "description": "",
+                }
+            ],
+            "signals": [
+                {
+                    "name": "s_{}".format(k),
+                    "arguments": ["a", "b"],
+                    "signature": "signal s_{}(a, b)".format(k),
+                    "description": self.make_description(
+                        symbols, short_description_lines
+                    ),
+                }
+                for k in range(2)
+            ],
+            "methods": methods,
+            "static_functions": [dict(methods[0], name="static_f")],
+        }
+
+    def make_method(self, index: int, symbols: List[str]) -> dict:
+        rnd: random.Random = self.random
+        arguments: List[dict] = [
+            {"name": "a{}".format(k), "type": rnd.choice(TYPES)}
+            for k in range(rnd.randint(0, 3))
+        ]
+        return_type: str = rnd.choice(TYPES + ["null"])
+        description: str = self.make_description(
+            symbols, max(1, self.description_lines // 2)
+        )
+        name: str = "f_{}".format(index)
+        # Every fifth method is a private virtual method, which the docs include.
+        if index % 5 == 1:
+            name = "_" + name
+            description = "@tags virtual\n" + description
+        return _make_method_data(name, arguments, return_type, description)
+
+    def make_member(self, index: int, symbols: List[str]) -> dict:
+        rnd: random.Random = self.random
+        data_type: str = rnd.choice(TYPES)
+        return {
+            "name": "m_{}".format(index),
+            "data_type": data_type,
+            "default_value": 0,
+            "setter": rnd.choice(["", "set_m", "_set_m"]),
+            "getter": rnd.choice(["", "get_m"]),
+            "export": rnd.random() < 0.5,
+            "signature": "var m_{}: {}".format(index, data_type),
+            "description": self.make_description(
+                symbols, max(1, self.description_lines // 4)
+            ),
+        }
+
+    def make_description(self, symbols: List[str], line_count: int) -> str:
+        """Returns random text with references to classes, to the class's `symbols`,
+        to members of other classes, to missing classes, and markdown lists."""
+        rnd: random.Random = self.random
+        lines: List[str] = []
+        for _ in range(line_count):
+            words: List[str] = [rnd.choice(WORDS) for _ in range(rnd.randint(4, 14))]
+            if rnd.random() < self.link_density:
+                reference: str = ""
+                kind: float = rnd.random()
+                if kind < 0.45:
+                    reference = "[{}]".format(rnd.choice(self.names))
+                elif kind < 0.75 and symbols:
+                    reference = "[{}]".format(rnd.choice(symbols))
+                elif kind < 0.9:
+                    reference = "[{}.m_{}]".format(
+                        rnd.choice(self.names), rnd.randint(0, self.members)
+                    )
+                else:
+                    reference = "[{}] and [Missing]".format(rnd.choice(self.names))
+                words.insert(rnd.randint(0, len(words)), reference)
+            elif rnd.random() < 0.1:
+                words.insert(0, "  - nested *list*")
+            lines.append(" ".join(words))
+        if rnd.random() < 0.2:
+            lines.extend(["", "", "More details"])
+        return "\n".join(lines)
+
+
+def make_project(class_count: int, seed: int = 0, **options) -> dict:
+    """Returns the dictionary of a synthetic project. See `ProjectGenerator` for the
+    options."""
+    return ProjectGenerator(class_count, seed, **options).make_project()
+
+
+def write_project(project: dict, path: str, ndjson: bool = False) -> None:
+    """Writes the project to `path` like `Collector.print_pretty_json`, or like
+    `Collector.print_ndjson` if `ndjson` is `True`."""
+    with open(path, "w") as file_out:
+        if not ndjson:
+            json.dump(project, file_out, indent=2)
+            return
+        header: dict = {k: v for k, v in project.items() if k != "classes"}
+        file_out.write(json.dumps(header) + "\n")
+        for entry in project["classes"]:
+            file_out.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+
+def add_generator_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the options of `ProjectGenerator` to the command line `parser`."""
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument(
+        "--members", type=int, default=6, help="Properties and methods per class."
+    )
+    parser.add_argument(
+        "--description-lines",
+        type=int,
+        default=4,
+        help="Number of lines in class descriptions.",
+    )
+    parser.add_argument(
+        "--link-density",
+        type=float,
+        default=0.6,
+        help="Probability for a description line to contain a reference.",
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=4,
+        help="Maximum number of ancestors from the project per class.",
+    )
+    parser.add_argument(
+        "--sub-classes", type=int, default=1, help="Inner classes per class."
+    )
+    parser.add_argument(
+        "--sub-class-depth", type=int, default=1, help="Levels of nested inner classes."
+    )
+
+
+def get_generator_options(namespace: argparse.Namespace) -> dict:
+    """Returns the keyword arguments of `make_project()` from parsed arguments."""
+    return {
+        "members": namespace.members,
+        "description_lines": namespace.description_lines,
+        "link_density": namespace.link_density,
+        "depth": namespace.depth,
+        "sub_classes": namespace.sub_classes,
+        "sub_class_depth": namespace.sub_class_depth,
+    }
+
+
+def _make_method_data(
+    name: str, arguments: List[dict], return_type: str, description: str
+) -> dict:
+    signature: str = "func {}({}) -> {}".format(
+        name,
+        ", ".join("{}: {}".format(a["name"], a["type"]) for a in arguments),
+        return_type,
+    )
+    return {
+        "name": name,
+        "return_type": return_type,
+        "arguments": arguments,
+        "rpc_mode": 0,
+        "signature": signature,
+        "description": description,
+    }
+
+
+def _make_constant_data(name: str, value: dict, signature: str, description: str):
+    return {
+        "name": name,
+        "value": value,
+        "data_type": "Dictionary",
+        "signature": signature,
+        "description": description,
+    }
+
+
+def main(args: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("classes", type=int, help="Number of classes to generate.")
+    parser.add_argument("-o", "--output", default="-", help="Output file path.")
+    parser.add_argument(
+        "--ndjson", action="store_true", help="Write newline-delimited JSON."
+    )
+    add_generator_arguments(parser)
+    namespace: argparse.Namespace = parser.parse_args(args)
+
+    project: dict = make_project(
+        namespace.classes, namespace.seed, **get_generator_options(namespace)
+    )
+    if namespace.output == "-":
+        json.dump(project, sys.stdout, indent=2)
+    else:
+        write_project(project, namespace.output, namespace.ndjson)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
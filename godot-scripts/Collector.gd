@@ -127,3 +127,51 @@ func remove_warnings_from_description(description: String) -> String:
 
 func print_pretty_json(reference: Dictionary) -> String:
 	return JSON.print(reference, "  ")
+
+
+# Returns the reference as newline-delimited JSON: a first line with the project's
+# name, description, and version, followed by one compact line per class.
+func print_ndjson(reference: Dictionary) -> String:
+	var header := reference.duplicate()
+	header.erase("classes")
+	var lines := PoolStringArray([JSON.print(header)])
+	for symbols in reference["classes"]:
+		lines.append(JSON.print(symbols))
+	return lines.join("\n") + "\n"
+
+
+# Saves the reference as a shard directory at `dirpath`: a project.json file with the
+# project's name, description, and version, and one JSON file per script, in
+# subdirectories that mirror the project. Only writes the shards whose content
+# changed and deletes the shards of scripts that no longer exist, so GDScript docs
+# maker only parses the shards of the scripts that changed.
+func save_shards(reference: Dictionary, dirpath := "res://reference") -> void:
+	var header := reference.duplicate()
+	header.erase("classes")
+	save_text_if_changed(dirpath.plus_file("project.json"), JSON.print(header))
+	var saved := {}
+	for symbols in reference["classes"]:
+		var path: String = dirpath.plus_file(symbols["path"].trim_prefix("res://") + ".json")
+		save_text_if_changed(path, JSON.print(symbols, "  "))
+		saved[path] = true
+	var directory := Directory.new()
+	for path in find_files(dirpath, ["*.gd.json"], true):
+		if not saved.has(path):
+			directory.remove(path)
+	print("Saved %s shards to %s" % [saved.size(), dirpath])
+
+
+# Saves text to a file, unless the file already has this content, to keep its
+# modification time.
+func save_text_if_changed(path: String, content: String) -> void:
+	var file := File.new()
+	if file.file_exists(path) and file.open(path, File.READ) == OK:
+		var previous := file.get_as_text()
+		file.close()
+		if previous == content:
+			return
+	var directory := Directory.new()
+	directory.make_dir_recursive(path.get_base_dir())
+	file.open(path, File.WRITE)
+	file.store_string(content)
+	file.close()
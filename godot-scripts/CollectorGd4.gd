@@ -126,3 +126,45 @@ func remove_warnings_from_description(description: String) -> String:
 
 func print_pretty_json(reference: Dictionary) -> String:
 	return JSON.stringify(reference, "  ")
+
+
+## Returns the reference as newline-delimited JSON: a first line with the project's
+## name, description, and version, followed by one compact line per class.
+func print_ndjson(reference: Dictionary) -> String:
+	var header := reference.duplicate()
+	header.erase("classes")
+	var lines := PackedStringArray([JSON.stringify(header)])
+	for symbols in reference["classes"]:
+		lines.append(JSON.stringify(symbols))
+	return "\n".join(lines) + "\n"
+
+
+## Saves the reference as a shard directory at `dirpath`: a project.json file with the
+## project's name, description, and version, and one JSON file per script, in
+## subdirectories that mirror the project. Only writes the shards whose content
+## changed and deletes the shards of scripts that no longer exist, so GDScript docs
+## maker only parses the shards of the scripts that changed.
+func save_shards(reference: Dictionary, dirpath := "res://reference") -> void:
+	var header := reference.duplicate()
+	header.erase("classes")
+	save_text_if_changed(dirpath.path_join("project.json"), JSON.stringify(header))
+	var saved := {}
+	for symbols in reference["classes"]:
+		var path: String = dirpath.path_join(symbols["path"].trim_prefix("res://") + ".json")
+		save_text_if_changed(path, JSON.stringify(symbols, "  "))
+		saved[path] = true
+	for path in find_files(dirpath, ["*.gd.json"], true):
+		if not saved.has(path):
+			DirAccess.remove_absolute(path)
+	print("Saved %s shards to %s" % [saved.size(), dirpath])
+
+
+## Saves text to a file, unless the file already has this content, to keep its
+## modification time.
+func save_text_if_changed(path: String, content: String) -> void:
+	if FileAccess.file_exists(path) and FileAccess.get_file_as_string(path) == content:
+		return
+	DirAccess.make_dir_recursive_absolute(path.get_base_dir())
+	var file := FileAccess.open(path, FileAccess.WRITE)
+	file.store_string(content)
+	file.close()
@@ -10,11 +10,22 @@ var directories := ["res://"]
 var is_recursive: = true
 ## A list of patterns to filter files.
 var patterns := ["*.gd"]
+## If true, saves the reference as newline-delimited JSON, with one class per line, to
+## res://reference.ndjson. This format loads faster on large projects.
+var is_ndjson := false
+## If true, saves the reference as a shard directory, res://reference, with one JSON file
+## per script. Only the shards of the scripts that changed get written and parsed again.
+var is_sharded := false
 
 
 func _init() -> void:
 	var files := PackedStringArray()
 	for dirpath in directories:
 		files.append_array(Collector.find_files(dirpath, patterns, is_recursive))
-	var json: String = Collector.print_pretty_json(Collector.get_reference(files))
-	Collector.save_text("res://reference.json", json)
+	var reference: Dictionary = Collector.get_reference(files)
+	if is_sharded:
+		Collector.save_shards(reference, "res://reference")
+	elif is_ndjson:
+		Collector.save_text("res://reference.ndjson", Collector.print_ndjson(reference))
+	else:
+		Collector.save_text("res://reference.json", Collector.print_pretty_json(reference))
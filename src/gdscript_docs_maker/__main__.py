@@ -1,20 +1,39 @@
 """Merges JSON dumped by Godot's gdscript language server or converts it to a markdown
 document.
 """
-import json
+
 import logging
 import os
 import sys
 from argparse import Namespace
-from itertools import repeat
-from typing import List
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 import pkg_resources
 
-from . import command_line
+from . import (
+    archive,
+    command_line,
+    incremental,
+    model_cache,
+    parallel,
+    pipeline,
+    profiling,
+    reference_file,
+    search_index,
+    streaming,
+    sync,
+    templates,
+    versions,
+    watch,
+)
 from .config import LOG_LEVELS, LOGGER
-from .convert_to_markdown import convert_to_markdown
-from .gdscript_objects import GDScriptClasses, ProjectInfo
+from .convert_to_markdown import (
+    convert_class_to_documents,
+    convert_index_to_documents,
+    get_format_directories,
+    get_page_filenames,
+)
+from .gdscript_objects import GDScriptClass, GDScriptClasses, ProjectInfo
 from .make_markdown import MarkdownDocument
 
 
@@ -26,48 +45,286 @@ def main():
         sys.exit()
 
     logging.basicConfig(level=LOG_LEVELS[min(args.verbose, len(LOG_LEVELS) - 1)])
-    LOGGER.debug("Output format: {}".format(args.format))
-    json_files: List[str] = [f for f in args.files if f.lower().endswith(".json")]
+    LOGGER.debug("Output formats: {}".format(args.formats))
+    try:
+        for output_format in args.formats:
+            templates.get_layout(args, output_format)
+        if args.versions:
+            for option in [
+                "archive",
+                "incremental",
+                "model_cache",
+                "search_index",
+                "stream",
+                "watch",
+                "profile",
+                "cprofile",
+            ]:
+                if getattr(args, option):
+                    LOGGER.warning(
+                        "The --{} option has no effect with --versions.".format(option)
+                    )
+            report: versions.VersionsReport = versions.convert_versions(args)
+            LOGGER.info(report)
+            return
+    except (OSError, ValueError) as error:
+        LOGGER.error(error)
+        sys.exit(1)
+    json_files: List[str] = [
+        f for f in args.files if reference_file.is_reference_file(f)
+    ]
     LOGGER.info("Processing JSON files: {}".format(json_files))
-    for f in json_files:
-        with open(f, "r") as json_file:
-            data: list = json.loads(json_file.read())
-            project_info: ProjectInfo = ProjectInfo.from_dict(data)
-            classes: GDScriptClasses = GDScriptClasses.from_dict_list(data["classes"])
-            classes_count: int = len(classes)
+    if args.watch:
+        for option in [
+            "archive",
+            "incremental",
+            "search_index",
+            "stream",
+            "profile",
+            "cprofile",
+        ]:
+            if getattr(args, option):
+                LOGGER.warning(
+                    "The --{} option has no effect with --watch.".format(option)
+                )
+        watch.Watcher(args).run(json_files)
+        return
 
+    output_path: str = os.path.normpath(args.path)
+    profiler: profiling.Profiler = profiling.Profiler(
+        args.profile or args.cprofile, output_path + ".prof" if args.cprofile else ""
+    )
+    profiler.start()
+    models: Optional[model_cache.ModelCache] = model_cache.from_arguments(args)
+    build_cache: Optional[incremental.BuildCache] = None
+    if args.incremental:
+        if args.stream:
+            LOGGER.warning("The --incremental option has no effect with --stream.")
+        elif args.archive:
+            LOGGER.warning("The --incremental option has no effect with --archive.")
+        else:
+            build_cache = incremental.BuildCache(args.path, args)
+
+    output: Optional[archive.Output] = None
+    if args.dry_run:
+        pass
+    elif args.archive:
+        try:
+            output = archive.ArchiveOutput(args.archive, args.compression_level)
+        except (OSError, ValueError) as error:
+            LOGGER.error(error)
+            sys.exit(1)
+    else:
+        for _, dirname in get_format_directories(args):
+            dirpath: str = os.path.join(args.path, dirname)
+            if not os.path.exists(dirpath):
+                LOGGER.info("Creating directory " + dirpath)
+                os.makedirs(dirpath)
+        output = sync.OutputSync(args.path)
+    # The search index is only saved with the pages, so dry runs skip it.
+    search: Optional[search_index.SearchIndex] = None
+    if args.search_index and output is not None:
+        search = search_index.SearchIndex()
+
+    try:
+        # Maps the generated filenames to the reference file they come from.
+        sources: Dict[str, str] = {}
+        if args.jobs > 1 and len(json_files) > 1 and not args.stream:
+            with profiler.stage("convert_files"):
+                for result in parallel.convert_files(
+                    json_files, args, args.jobs, build_cache
+                ):
+                    _log_project(result.path, result.info, result.classes_count)
+                    if search is not None and result.search is not None:
+                        search.merge(result.search)
+                    for filename, text in result.documents:
+                        _check_collision(sources, filename, result.path)
+                        if output is None:
+                            LOGGER.debug("Generated " + filename)
+                        else:
+                            output.write(filename, text)
+                    if isinstance(output, sync.OutputSync):
+                        for filename in result.kept:
+                            output.keep(filename)
+                    if output is not None:
+                        LOGGER.info(
+                            "Saved {} markdown files".format(len(result.documents))
+                        )
+        else:
+            for f in json_files:
+                project_info: ProjectInfo
+                classes: GDScriptClasses
+                documents: Iterable[MarkdownDocument]
+                selection: Optional[List[GDScriptClass]] = None
+                if args.stream:
+                    with profiler.stage("index"):
+                        project_info, classes = streaming.index_classes(
+                            f, args.reverse_references
+                        )
+                    documents = streaming.iter_markdown(
+                        f, classes, args, project_info, search
+                    )
+                else:
+                    project_info, classes = model_cache.load(
+                        f,
+                        models,
+                        args.jobs,
+                        hash_sources=build_cache is not None,
+                        profiler=profiler,
+                    )
+                    if build_cache:
+                        with profiler.stage("cache"):
+                            selection = build_cache.update(f, classes)
+                    # Profiling times every class, which requires converting them in
+                    # this process. The search index is built in the same pass.
+                    documents = parallel.iter_markdown(
+                        classes,
+                        args,
+                        project_info,
+                        selection,
+                        1 if profiler.enabled else args.jobs,
+                        search,
+                    )
+                if profiler.enabled:
+                    resolver = classes.reference_resolver
+                    resolver.replace_references = profiler.timed(
+                        resolver.replace_references, "references"
+                    )
+                    documents = profiler.iter_documents(documents)
+                _log_project(f, project_info, len(classes))
+
+                documents_count: int = 0
+                if output is None:
+                    for document in documents:
+                        _check_collision(sources, document.get_filename(), f)
+                        LOGGER.debug(document)
+                        documents_count += 1
+                    LOGGER.debug(
+                        "Generated {} markdown documents.".format(documents_count)
+                    )
+                elif profiler.enabled:
+                    LOGGER.info("Saving markdown files to {}".format(args.path))
+                    for document in documents:
+                        _check_collision(sources, document.get_filename(), f)
+                        with profiler.stage("as_string"):
+                            text: str = document.as_string()
+                        with profiler.stage("save"):
+                            output.write(document.get_filename(), text)
+                        documents_count += 1
+                    LOGGER.info("Saved {} markdown files".format(documents_count))
+                else:
+                    LOGGER.info("Saving markdown files to {}".format(args.path))
+                    documents_count = _save_pipelined(
+                        output,
+                        f,
+                        classes,
+                        project_info,
+                        documents,
+                        sources,
+                        args,
+                        search,
+                    )
+                    LOGGER.info("Saved {} markdown files".format(documents_count))
+                if isinstance(output, sync.OutputSync) and selection is not None:
+                    converted: Set[str] = {gdscript.name for gdscript in selection}
+                    for gdscript in classes:
+                        if gdscript.name not in converted:
+                            for filename in get_page_filenames(args, gdscript.name):
+                                output.keep(filename)
+
+        if output is not None and search is not None:
+            with profiler.stage("search_index"):
+                for filename, text in search.iter_files():
+                    output.write(filename, text)
             LOGGER.info(
-                "Project {}, version {}".format(project_info.name, project_info.version)
-            )
-            LOGGER.info(
-                "Processing {} classes in {}".format(classes_count, os.path.basename(f))
+                "Saved a search index of {} symbols".format(len(search.symbols))
             )
+    except BaseException:
+        # Doesn't leave an incomplete archive next to the previous one.
+        if isinstance(output, archive.ArchiveOutput):
+            output.abort()
+        raise
+    if output is not None:
+        with profiler.stage("finish"):
+            output.finish()
+            if build_cache:
+                build_cache.save()
+
+    if profiler.enabled:
+        profiler.stop()
+        profiler.save(output_path + ".profile.json")
 
-            documents: List[MarkdownDocument] = convert_to_markdown(
-                classes, args, project_info
-            )
-            if args.dry_run:
-                LOGGER.debug("Generated {} markdown documents.".format(len(documents)))
-                list(map(lambda doc: LOGGER.debug(doc), documents))
-            else:
-                if not os.path.exists(args.path):
-                    LOGGER.info("Creating directory " + args.path)
-                    os.mkdir(args.path)
-
-                LOGGER.info(
-                    "Saving {} markdown files to {}".format(len(documents), args.path)
-                )
-                list(map(save, documents, repeat(args.path)))
 
+def _save_pipelined(
+    output: archive.Output,
+    path: str,
+    classes: GDScriptClasses,
+    info: ProjectInfo,
+    documents: Iterable[MarkdownDocument],
+    sources: Dict[str, str],
+    arguments: Namespace,
+    search: Optional[search_index.SearchIndex] = None,
+) -> int:
+    """Saves the `documents` converted from the reference file at `path`, writing
+    files while the next documents render, and returns the number of saved files.
+    With --stream, parsing the classes is a separate stage of the pipeline, which also
+    adds them to the `search` index."""
 
-def save(
-    document: MarkdownDocument,
-    dirpath: str,
-):
-    path: str = os.path.join(dirpath, document.get_filename())
-    with open(path, "w") as file_out:
-        LOGGER.debug("Saving markdown file " + path)
-        file_out.write(document.as_string())
+    count: int = 0
+
+    def write(document: MarkdownDocument) -> None:
+        nonlocal count
+        _check_collision(sources, document.get_filename(), path)
+        output.write(document.get_filename(), document.as_string())
+        count += 1
+
+    def write_all(documents: List[MarkdownDocument]) -> None:
+        for document in documents:
+            write(document)
+
+    def render(gdscript: GDScriptClass) -> List[MarkdownDocument]:
+        if search is not None:
+            search.add_class(gdscript)
+        return convert_class_to_documents(classes, gdscript, arguments)
+
+    source: Iterable[Any] = documents
+    source_name: str = "render"
+    stages: List[Tuple[str, Callable[[Any], Any]]] = [("write", write)]
+    if arguments.stream:
+        if arguments.make_index:
+            write_all(convert_index_to_documents(classes, info, arguments))
+        # Every class renders to one document per output format.
+        source, source_name = streaming.iter_classes(path), "parse"
+        stages = [("render", render), ("write", write_all)]
+
+    pipeline.log_throughputs(pipeline.run(source, stages, source_name))
+    return count
+
+
+def _log_project(path: str, info: ProjectInfo, classes_count: int) -> None:
+    LOGGER.info("Project {}, version {}".format(info.name, info.version))
+    LOGGER.info(
+        "Processing {} classes in {}".format(classes_count, os.path.basename(path))
+    )
+
+
+def _check_collision(sources: Dict[str, str], filename: str, path: str) -> None:
+    """Warns if a document named `filename` was already generated, as the document
+    from the reference file at `path` replaces it."""
+    previous: Optional[str] = sources.get(filename)
+    if previous == path:
+        LOGGER.warning(
+            "Several classes of {} generate {}, keeping the last one.".format(
+                path, filename
+            )
+        )
+    elif previous is not None:
+        LOGGER.warning(
+            "{} and {} both generate {}, keeping the one from {}.".format(
+                previous, path, filename, path
+            )
+        )
+    sources[filename] = path
 
 
 if __name__ == "__main__":
@@ -0,0 +1,162 @@
+"""Writes the generated documents into a single zip or tar archive, for the --archive
+option.
+
+The archive is written sequentially, to a temporary file renamed once complete. Its
+entries come in the order the documents are generated, with fixed timestamps and
+permissions, so the same input produces the same archive byte for byte.
+"""
+
+import bz2
+import contextlib
+import gzip
+import io
+import lzma
+import os
+import tarfile
+import tempfile
+import zipfile
+from typing import BinaryIO, Dict, Optional, Tuple, Union
+
+from .config import LOGGER
+from .sync import OutputSync, get_file_mode
+
+# Timestamp of every entry: the earliest date the zip format supports.
+ENTRY_DATE_TIME: Tuple[int, int, int, int, int, int] = (1980, 1, 1, 0, 0, 0)
+ENTRY_MTIME: int = 315532800
+ENTRY_MODE: int = 0o644
+# Archive extensions and the matching tarfile compression, or "zip" for zip files.
+ARCHIVE_FORMATS: Dict[str, str] = {
+    ".zip": "zip",
+    ".tar": "",
+    ".tar.gz": "gz",
+    ".tgz": "gz",
+    ".tar.bz2": "bz2",
+    ".tar.xz": "xz",
+}
+
+# Destination of the generated documents: a directory or an archive.
+Output = Union[OutputSync, "ArchiveOutput"]
+
+
+def get_archive_format(path: str) -> Optional[str]:
+    """Returns the format of the archive at `path` from its extension, as a value of
+    ARCHIVE_FORMATS, or `None` if the extension isn't supported."""
+    for extension, archive_format in ARCHIVE_FORMATS.items():
+        if path.lower().endswith(extension):
+            return archive_format
+    return None
+
+
+class ArchiveOutput:
+    """Writes files into the archive at `path`, like `OutputSync` writes files into
+    a directory. Call `finish()` once all files are written, or `abort()` if the
+    conversion fails.
+
+    Arguments:
+
+    - compression_level: from 0 to 9. For zip archives, 0 stores files without
+      compression. Uses the default level of each format if `None`.
+
+    """
+
+    def __init__(self, path: str, compression_level: Optional[int] = None):
+        archive_format: Optional[str] = get_archive_format(path)
+        if archive_format is None:
+            raise ValueError(
+                "Unsupported archive extension for {}. Use one of {}.".format(
+                    path, ", ".join(ARCHIVE_FORMATS)
+                )
+            )
+        self.path: str = path
+        self.count: int = 0
+
+        dirpath: str = os.path.dirname(path) or "."
+        os.makedirs(dirpath, exist_ok=True)
+        file_descriptor, self._temporary_path = tempfile.mkstemp(
+            dir=dirpath, prefix=".", suffix=".tmp"
+        )
+        self._file: BinaryIO = os.fdopen(file_descriptor, "wb")
+        self._compressor: Optional[io.BufferedIOBase] = None
+        self._compression_level: Optional[int] = compression_level
+        self._archive: Union[zipfile.ZipFile, tarfile.TarFile]
+        try:
+            self._open(archive_format, compression_level)
+        except BaseException:
+            self._file.close()
+            os.remove(self._temporary_path)
+            raise
+
+    def _open(self, archive_format: str, compression_level: Optional[int]) -> None:
+        """Opens the archive and its compressor on the temporary file."""
+        if archive_format == "zip":
+            self._compress_type: int = (
+                zipfile.ZIP_STORED if compression_level == 0 else zipfile.ZIP_DEFLATED
+            )
+            self._archive = zipfile.ZipFile(
+                self._file, "w", self._compress_type, compresslevel=compression_level
+            )
+            return
+
+        level: int = 9 if compression_level is None else compression_level
+        if archive_format == "gz":
+            # Unlike tarfile, sets the timestamp and the filename in the gzip header
+            # to fixed values.
+            self._compressor = gzip.GzipFile(
+                filename="", mode="wb", fileobj=self._file, compresslevel=level, mtime=0
+            )
+        elif archive_format == "bz2":
+            # bz2 has no level 0, so it uses the fastest level, 1.
+            self._compressor = bz2.BZ2File(
+                self._file, "wb", compresslevel=max(1, level)
+            )
+        elif archive_format == "xz":
+            self._compressor = lzma.LZMAFile(self._file, "wb", preset=compression_level)
+        self._archive = tarfile.open(
+            fileobj=self._compressor or self._file,
+            mode="w|",
+            format=tarfile.PAX_FORMAT,
+        )
+
+    def write(self, filename: str, text: str) -> None:
+        """Adds the file `filename` with the content `text` to the archive."""
+        data: bytes = text.encode("utf-8")
+        if isinstance(self._archive, zipfile.ZipFile):
+            info: zipfile.ZipInfo = zipfile.ZipInfo(filename, ENTRY_DATE_TIME)
+            info.compress_type = self._compress_type
+            info.external_attr = ENTRY_MODE << 16
+            # ZipFile.writestr() ignores the archive's level for ZipInfo entries.
+            self._archive.writestr(info, data, compresslevel=self._compression_level)
+        else:
+            tar_info: tarfile.TarInfo = tarfile.TarInfo(filename)
+            tar_info.size = len(data)
+            tar_info.mtime = ENTRY_MTIME
+            tar_info.mode = ENTRY_MODE
+            self._archive.addfile(tar_info, io.BytesIO(data))
+        self.count += 1
+
+    def finish(self) -> None:
+        """Completes the archive and moves it to its path."""
+        try:
+            self._archive.close()
+            if self._compressor:
+                self._compressor.close()
+            self._file.close()
+            os.chmod(self._temporary_path, get_file_mode())
+            os.replace(self._temporary_path, self.path)
+        except BaseException:
+            self.abort()
+            raise
+        LOGGER.info("Saved {} files to {}".format(self.count, self.path))
+
+    def abort(self) -> None:
+        """Deletes the incomplete archive, when the conversion fails before
+        `finish()`."""
+        # Closes the archive and the compressor first, as they write their end when
+        # garbage collected.
+        for stream in [self._archive, self._compressor]:
+            if stream is not None:
+                with contextlib.suppress(Exception):
+                    stream.close()
+        self._file.close()
+        if os.path.exists(self._temporary_path):
+            os.remove(self._temporary_path)
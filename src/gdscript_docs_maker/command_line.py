@@ -1,8 +1,11 @@
 import datetime
+import os
 import sys
 from argparse import ArgumentParser, Namespace
 from enum import Enum
 
+from .archive import ARCHIVE_FORMATS, get_archive_format
+
 
 class OutputFormats(Enum):
     MARDKOWN = "markdown"
@@ -27,6 +30,21 @@ def _set_date(args) -> datetime.date:
     return date
 
 
+def _validate_jobs(args) -> int:
+    """Validates the jobs argument, where 0 stands for the number of CPU cores"""
+    jobs: int = int(args)
+    if jobs < 0:
+        raise ValueError(args)
+    return jobs if jobs > 0 else os.cpu_count() or 1
+
+
+def _validate_archive(args) -> str:
+    """Validates the archive argument, which must have a supported extension"""
+    if args and get_archive_format(args) is None:
+        raise ValueError(args)
+    return args
+
+
 def parse(args=sys.argv) -> Namespace:
     parser: ArgumentParser = ArgumentParser(
         prog="GDScript Docs Maker",
@@ -34,18 +52,57 @@ def parse(args=sys.argv) -> Namespace:
         "GDScript language server to create a code reference.",
     )
     parser.add_argument(
-        "files", type=str, nargs="+", default="", help="A list of paths to JSON files."
+        "files",
+        type=str,
+        nargs="+",
+        default="",
+        help="A list of paths to JSON or newline-delimited JSON (.ndjson) files, or to"
+        " shard directories with a project.json file and one JSON file per script.",
     )
     parser.add_argument(
         "-p", "--path", type=str, default="export", help="Path to the output directory."
     )
+    parser.add_argument(
+        "--archive",
+        type=_validate_archive,
+        default="",
+        help="Path to an archive to save the files to instead of the output"
+        " directory. The extension sets the format, one of: "
+        + ", ".join(ARCHIVE_FORMATS)
+        + ". The same input always produces the same archive.",
+    )
+    parser.add_argument(
+        "--compression-level",
+        type=int,
+        choices=range(10),
+        default=None,
+        help="Compression level of the archive, from 0 to 9. With zip archives, 0"
+        " stores the files without compression. With bz2, 0 is the same as 1.",
+    )
+    parser.add_argument(
+        "--reverse-references",
+        action="store_true",
+        default=False,
+        help="List the classes that inherit from each class and the classes that"
+        " link to it on its page.",
+    )
+    parser.add_argument(
+        "--search-index",
+        action="store_true",
+        default=False,
+        help="Also save a search index of the classes and their symbols, as JSON"
+        " files sharded by first letter, for websites to search the reference.",
+    )
     parser.add_argument(
         "-f",
         "--format",
         type=_validate_output_format,
-        default=OutputFormats.MARDKOWN,
+        action="append",
+        dest="formats",
         help="Output format for the markdown files. Either markdown (default) or hugo,"
-        " for the hugo static website generator.",
+        " for the hugo static website generator. Repeat the option to output several"
+        " formats from a single conversion, each in a subdirectory named after the"
+        " format.",
     )
     parser.add_argument(
         "-d",
@@ -63,6 +120,14 @@ def parse(args=sys.argv) -> Namespace:
         help="ID of the author for hugo's front-matter. Only used for the hugo "
         "export format.",
     )
+    parser.add_argument(
+        "--templates",
+        type=str,
+        default="",
+        help="Path to a directory of page layouts that replace the default ones,"
+        " named after the output format: markdown.md or hugo.md. See templates.py"
+        " for the available fields.",
+    )
     parser.add_argument(
         "-i",
         "--make-index",
@@ -70,6 +135,86 @@ def parse(args=sys.argv) -> Namespace:
         default=False,
         help="If this flag is present, create an index.md page with a table of contents.",
     )
+    parser.add_argument(
+        "--index-page-size",
+        type=int,
+        default=0,
+        help="With --make-index, split the index into a top-level page that links to"
+        " one index page per category, with at most this many classes per page."
+        " Default: 0, a single index page.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=_validate_jobs,
+        default=1,
+        help="Number of worker processes. With several reference files, converts"
+        " the files in parallel. With one file, parses it in parallel if it's a"
+        " newline-delimited JSON file, and converts its classes in parallel. Use 0"
+        " to start one process per CPU core. Default: 1.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        default=False,
+        help="Only convert the classes that changed since the last run, and the"
+        " classes that inherit from or link to them. Stores a cache file in the"
+        " output directory.",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        default=False,
+        help="Read each file twice: once to index the classes, then to convert and"
+        " save them one at a time. Keeps memory use low on very large projects.",
+    )
+    parser.add_argument(
+        "--model-cache",
+        type=str,
+        default="",
+        help="Path to a directory to cache the classes built from the reference"
+        " files in. Converting an unchanged file again, for example to another"
+        " format, loads the classes from the cache instead of parsing the file.",
+    )
+    parser.add_argument(
+        "--model-cache-size",
+        type=int,
+        default=512,
+        help="Maximum size of the model cache in megabytes. Deletes the least"
+        " recently used entries above this size. Default: 512.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        default=False,
+        help="After converting the files, keep watching them for changes. Converts"
+        " the classes that changed again, along with the classes that inherit from"
+        " or link to them, and only writes the pages that changed. Stop with Ctrl+C.",
+    )
+    parser.add_argument(
+        "--versions",
+        action="store_true",
+        default=False,
+        help="Convert several versions of a project, given as LABEL=PATH files, each"
+        " to a subdirectory of the output named after its label. Classes whose pages"
+        " don't change between versions are converted once, and identical pages are"
+        " stored once, with hard links.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=False,
+        help="Measure the time and peak memory use of every stage of the run, and the"
+        " slowest classes to convert. Saves a JSON report next to the output"
+        " directory, named after it with the .profile.json extension.",
+    )
+    parser.add_argument(
+        "--cprofile",
+        action="store_true",
+        default=False,
+        help="Like --profile, and also record the run with cProfile. Saves the"
+        " statistics next to the output directory with the .prof extension.",
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -94,4 +239,10 @@ def parse(args=sys.argv) -> Namespace:
     )
     namespace: Namespace = parser.parse_args(args)
     namespace.verbose = 99999 if namespace.dry_run else namespace.verbose
+    # Repeating a format doesn't generate it twice.
+    namespace.formats = list(
+        dict.fromkeys(namespace.formats or [OutputFormats.MARDKOWN])
+    )
+    # The first format, for the code that handles a single format.
+    namespace.format = namespace.formats[0]
     return namespace
@@ -4,101 +4,192 @@ documents
 """
 import re
 from argparse import Namespace
-from typing import List
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
 
-from . import hugo
 from .command_line import OutputFormats
-from .config import LOGGER
-from .gdscript_objects import Element, GDScriptClass, GDScriptClasses, ProjectInfo
-from .hugo import HugoFrontMatter
+from .gdscript_objects import (
+    Element,
+    GDScriptClass,
+    GDScriptClasses,
+    ProjectInfo,
+    ReverseReferences,
+)
 from .make_markdown import (
     MarkdownDocument,
     MarkdownSection,
+    MarkdownWriter,
     make_bold,
     make_code_block,
-    make_comment,
-    make_heading,
     make_link,
+    make_list,
     make_table_header,
     make_table_row,
     surround_with_html,
-    wrap_in_newlines,
 )
+from .templates import get_layout
+
+INDEX_TITLE: str = "index"
+# Title of the index page of the classes without a category.
+UNCATEGORIZED_TITLE: str = "Uncategorized"
+PATTERN_NOT_SLUG = re.compile(r"[^a-z0-9]+")
 
 
 def convert_to_markdown(
-    classes: GDScriptClasses, arguments: Namespace, info: ProjectInfo
+    classes: GDScriptClasses,
+    arguments: Namespace,
+    info: ProjectInfo,
+    selection: Optional[Iterable[GDScriptClass]] = None,
 ) -> List[MarkdownDocument]:
     """Takes a list of dictionaries that each represent one GDScript class to
     convert to markdown and returns a list of markdown documents.
 
+    If `selection` is not `None`, only converts the classes it contains, linking to
+    every class in `classes`.
+
     """
-    markdown: List[MarkdownDocument] = []
+    return list(iter_markdown(classes, arguments, info, selection))
+
+
+def iter_markdown(
+    classes: GDScriptClasses,
+    arguments: Namespace,
+    info: ProjectInfo,
+    selection: Optional[Iterable[GDScriptClass]] = None,
+) -> Iterator[MarkdownDocument]:
+    """Like `convert_to_markdown()`, but converts and yields the documents one at a
+    time, with one document per output format for every page."""
     if arguments.make_index:
-        markdown.append(_write_index_page(classes, info))
-    for entry in classes:
-        markdown.append(_as_markdown(classes, entry, arguments))
-    return markdown
+        yield from convert_index_to_documents(classes, info, arguments)
+    for entry in classes if selection is None else selection:
+        yield from convert_class_to_documents(classes, entry, arguments)
 
 
-def _as_markdown(
+def convert_class_to_documents(
     classes: GDScriptClasses, gdscript: GDScriptClass, arguments: Namespace
-) -> MarkdownDocument:
-    """Converts the data for a GDScript class to a markdown document, using the command line
-    options."""
+) -> List[MarkdownDocument]:
+    """Converts a single GDScript class to a markdown document for every output
+    format. The documents share the body of the page, rendered once, and only differ
+    by the layout around it. The `classes` list only needs to provide the names,
+    parents, and symbols of the classes `gdscript` links to, so it can hold
+    GDScriptClassSummary objects."""
+    body: str = _as_markdown(classes, gdscript, arguments)
+    return [
+        _make_page(gdscript, body, arguments, output_format, dirname)
+        for output_format, dirname in get_format_directories(arguments)
+    ]
 
-    content: List[str] = []
-    output_format: OutputFormats = arguments.format
 
-    name: str = gdscript.name
-    if "abstract" in gdscript.metadata.tags:
-        name += " " + surround_with_html("(abstract)", "small")
+def convert_index_to_documents(
+    classes: GDScriptClasses, info: ProjectInfo, arguments: Namespace
+) -> List[MarkdownDocument]:
+    """Returns the index pages for every output format: a single page, or with
+    --index-page-size, a top-level page and the pages of every category."""
+    documents: List[MarkdownDocument] = (
+        _write_index_pages(classes, info, arguments.index_page_size)
+        if arguments.index_page_size > 0
+        else [_write_index_page(classes, info)]
+    )
+    return [
+        MarkdownDocument(_join(dirname, document.title), document.content)
+        for _, dirname in get_format_directories(arguments)
+        for document in documents
+    ]
+
 
-    if output_format == OutputFormats.HUGO:
-        front_matter: HugoFrontMatter = HugoFrontMatter.from_data(gdscript, arguments)
-        content += front_matter.as_string_list()
+def get_format_directories(arguments: Namespace) -> List[Tuple[OutputFormats, str]]:
+    """Returns the output formats and the subdirectory of the output their pages go
+    to: none with a single format, and the name of each format with several."""
+    if len(arguments.formats) == 1:
+        return [(arguments.formats[0], "")]
+    return [(output_format, output_format.value) for output_format in arguments.formats]
 
-    content += [
-        make_comment(
-            "Auto-generated from JSON by GDScript docs maker. "
-            "Do not edit this document directly."
-        )
-        + "\n"
+
+def get_page_filenames(arguments: Namespace, name: str) -> List[str]:
+    """Returns the filenames of the pages of the class `name`, one per output
+    format."""
+    return [
+        _join(dirname, name) + ".md" for _, dirname in get_format_directories(arguments)
     ]
 
-    if output_format == OutputFormats.MARDKOWN:
-        content += [*make_heading(name, 1)]
+
+def _make_page(
+    gdscript: GDScriptClass,
+    body: str,
+    arguments: Namespace,
+    output_format: OutputFormats,
+    dirname: str,
+) -> MarkdownDocument:
+    """Returns the document of `gdscript` with the layout of `output_format` around
+    its `body`. The document is made of several lines, which `as_string()` joins
+    like a single writer would."""
+    header, footer = get_layout(arguments, output_format).render(gdscript)
+    content: List[str] = [header, body] if header else [body]
+    if footer:
+        content.append(footer)
+    return MarkdownDocument(_join(dirname, gdscript.name), content)
+
+
+def _join(dirname: str, name: str) -> str:
+    return dirname + "/" + name if dirname else name
+
+
+def _as_markdown(
+    classes: GDScriptClasses, gdscript: GDScriptClass, arguments: Namespace
+) -> str:
+    """Converts the data for a GDScript class to the body of its page, which is the
+    same in every output format, using the command line options."""
+
+    writer: MarkdownWriter = MarkdownWriter()
+    output_format: OutputFormats = arguments.format
+
+    references: Optional[ReverseReferences] = (
+        classes.get_reverse_references() if arguments.reverse_references else None
+    )
+
     if gdscript.extends:
         extends_list: List[str] = gdscript.get_extends_tree(classes)
         extends_links = [make_link(entry, "../" + entry) for entry in extends_list]
-        content += [make_bold("Extends:") + " " + " < ".join(extends_links)]
+        writer.write_line(make_bold("Extends:") + " " + " < ".join(extends_links))
+    if references and references.get_inherited_by(gdscript.name):
+        inherited_links: List[str] = _make_class_links(
+            references.get_inherited_by(gdscript.name)
+        )
+        # Separates the line from the inheritance tree, as its own paragraph.
+        writer.write_line()
+        writer.write_line(make_bold("Inherited by:") + " " + ", ".join(inherited_links))
+    if gdscript.extends:
         description = _replace_references(classes, gdscript, gdscript.description)
-        content += [*MarkdownSection("Description", 2, [description]).as_text()]
+        MarkdownSection("Description", 2, [description]).write(writer)
 
-    content += _write_class(classes, gdscript, output_format, 2)
+    _write_class(writer, classes, gdscript, output_format, 2)
     if gdscript.signals:
-        content += MarkdownSection(
-            "Signals", 2, _write_signals(classes, gdscript, output_format)
-        ).as_text()
+        writer.write_heading("Signals", 2)
+        _write_signals(writer, classes, gdscript, output_format)
 
     if gdscript.sub_classes:
-        content += make_heading("Sub-classes", 2)
+        writer.write_heading("Sub-classes", 2)
     for cls in gdscript.sub_classes:
-        content += _write_class(classes, cls, output_format, 3, True)
+        _write_class(writer, classes, cls, output_format, 3, True)
+
+    if references and references.get_referenced_by(gdscript.name):
+        writer.write_heading("Referenced by", 2)
+        writer.write_lines(
+            make_list(_make_class_links(references.get_referenced_by(gdscript.name)))
+        )
 
-    return MarkdownDocument(gdscript.name, content)
+    return writer.getvalue()
 
 
 def _write_class(
+    writer: MarkdownWriter,
     classes: GDScriptClasses,
     gdscript: GDScriptClass,
     output_format: OutputFormats,
     heading_level: int,
     is_inner_class: bool = False,
-) -> List[str]:
-    markdown: List[str] = []
+) -> None:
     if is_inner_class:
-        markdown += make_heading(gdscript.name, heading_level)
+        writer.write_heading(gdscript.name, heading_level)
     for attribute, title in [
         ("enums", "Enumerations"),
         ("constants", "Constants Descriptions"),
@@ -107,12 +198,14 @@ def _write_class(
     ]:
         if not getattr(gdscript, attribute):
             continue
-        markdown += MarkdownSection(
-            title,
-            heading_level + 1 if is_inner_class else heading_level,
-            _write(attribute, classes, gdscript, output_format),
-        ).as_text()
-    return markdown
+        writer.write_heading(
+            title, heading_level + 1 if is_inner_class else heading_level
+        )
+        _write(writer, attribute, classes, gdscript, output_format)
+
+
+def _make_class_links(names: List[str]) -> List[str]:
+    return [make_link(name, "../" + name) for name in names]
 
 
 def _write_summary(gdscript: GDScriptClass, key: str) -> List[str]:
@@ -124,47 +217,122 @@ def _write_summary(gdscript: GDScriptClass, key: str) -> List[str]:
 
 
 def _write(
+    writer: MarkdownWriter,
     attribute: str,
     classes: GDScriptClasses,
     gdscript: GDScriptClass,
     output_format: OutputFormats,
     heading_level: int = 3,
-) -> List[str]:
+) -> None:
     assert hasattr(gdscript, attribute)
 
-    markdown: List[str] = []
     for element in getattr(gdscript, attribute):
         # assert element is Element
-        markdown.extend(make_heading(element.get_heading_as_string(), heading_level))
-        markdown.extend([make_code_block(element.signature), ""])
-        markdown.extend(element.get_unique_attributes_as_markdown())
-        markdown.append("")
-        description: str = _replace_references(classes, gdscript, element.description)
-        markdown.append(description)
-
-    return markdown
+        writer.write_heading(element.get_heading_as_string(), heading_level)
+        writer.write_line(make_code_block(element.signature))
+        writer.write_line()
+        writer.write_lines(element.get_unique_attributes_as_markdown())
+        writer.write_line()
+        writer.write_line(_replace_references(classes, gdscript, element.description))
 
 
 def _write_signals(
-    classes: GDScriptClasses, gdscript: GDScriptClass, output_format: OutputFormats
-) -> List[str]:
-    return wrap_in_newlines(
-        [
+    writer: MarkdownWriter,
+    classes: GDScriptClasses,
+    gdscript: GDScriptClass,
+    output_format: OutputFormats,
+) -> None:
+    writer.write_line()
+    for signal in gdscript.signals:
+        writer.write_line(
             "- {}: {}".format(
-                s.signature, _replace_references(classes, gdscript, s.description)
+                signal.signature,
+                _replace_references(classes, gdscript, signal.description),
             )
-            for s in gdscript.signals
-        ]
-    )
+        )
+    writer.write_line()
 
 
 def _write_index_page(classes: GDScriptClasses, info: ProjectInfo) -> MarkdownDocument:
     title: str = "{} ({})".format(info.name, surround_with_html(info.version, "small"))
     content: List[str] = [
-        *MarkdownSection(title, 1, info.description).as_text(),
+        *MarkdownSection(title, 1, [info.description]).as_text(),
         *MarkdownSection("Contents", 2, _write_table_of_contents(classes)).as_text(),
     ]
-    return MarkdownDocument("index", content)
+    return MarkdownDocument(INDEX_TITLE, content)
+
+
+def _write_index_pages(
+    classes: GDScriptClasses, info: ProjectInfo, page_size: int
+) -> List[MarkdownDocument]:
+    """Returns a top-level index page that links to the index page of every
+    category, followed by these pages, split every `page_size` classes."""
+    toc: List[str] = []
+    documents: List[MarkdownDocument] = []
+    slugs: Set[str] = set()
+    for group in classes.get_grouped_by_category():
+        category: str = group[0].metadata.category or UNCATEGORIZED_TITLE
+        slug: str = _make_unique_slug(category, slugs)
+        pages_count: int = (len(group) + page_size - 1) // page_size
+        titles: List[str] = [
+            "{}_{}".format(INDEX_TITLE, slug) + ("_{}".format(i + 1) if i else "")
+            for i in range(pages_count)
+        ]
+        toc.append(
+            "- {} ({} classes)".format(make_link(category, titles[0]), len(group))
+        )
+        for i in range(pages_count):
+            documents.append(
+                _write_category_page(
+                    category, group[i * page_size : (i + 1) * page_size], titles, i
+                )
+            )
+
+    title: str = "{} ({})".format(info.name, surround_with_html(info.version, "small"))
+    content: List[str] = [
+        *MarkdownSection(title, 1, [info.description]).as_text(),
+        *MarkdownSection("Contents", 2, toc).as_text(),
+    ]
+    return [MarkdownDocument(INDEX_TITLE, content)] + documents
+
+
+def _write_category_page(
+    category: str, group: List[GDScriptClass], titles: List[str], index: int
+) -> MarkdownDocument:
+    """Returns the page `index` of the category, out of the pages with the given
+    `titles`, with links to the top-level index and to the previous and next
+    pages."""
+    heading: str = category
+    if len(titles) > 1:
+        heading += " ({}/{})".format(index + 1, len(titles))
+    links: List[str] = [make_link("Index", INDEX_TITLE)]
+    if index > 0:
+        links.append(make_link("Previous", titles[index - 1]))
+    if index < len(titles) - 1:
+        links.append(make_link("Next", titles[index + 1]))
+    content: List[str] = [
+        *MarkdownSection(
+            heading,
+            1,
+            ["- " + make_link(gdscript.name, gdscript.name) for gdscript in group],
+        ).as_text(),
+        "",
+        " | ".join(links),
+    ]
+    return MarkdownDocument(titles[index], content)
+
+
+def _make_unique_slug(text: str, slugs: Set[str]) -> str:
+    """Returns `text` in lowercase with dashes between words, adding a number if
+    the result is already in `slugs`, and adds it to `slugs`."""
+    base: str = PATTERN_NOT_SLUG.sub("-", text.lower()).strip("-") or "category"
+    slug: str = base
+    number: int = 2
+    while slug in slugs:
+        slug = "{}-{}".format(base, number)
+        number += 1
+    slugs.add(slug)
+    return slug
 
 
 def _write_table_of_contents(classes: GDScriptClasses) -> List[str]:
@@ -175,7 +343,7 @@ def _write_table_of_contents(classes: GDScriptClasses) -> List[str]:
     for group in by_category:
         indent: str = ""
         first_class: GDScriptClass = group[0]
-        category: str = first_class.category
+        category: str = first_class.metadata.category
         if category:
             toc.append("- {}".format(make_bold(category)))
             indent = "  "
@@ -194,49 +362,4 @@ def _replace_references(
 ) -> str:
     """Finds and replaces references to other classes or methods in the
     `description`."""
-    ERROR_MESSAGES = {
-        "class": "Class {} not found in the class index.",
-        "member": "Symbol {} not found in {}. The name might be incorrect.",
-    }
-    ERROR_TAIL = "The name might be incorrect."
-
-    references: re.Match = re.findall(r"\[.+\]", description)
-    for reference in references:
-        # Matches [ClassName], [symbol], and [ClassName.symbol]
-        match: re.Match = re.match(
-            r"\[([A-Z][a-zA-Z0-9]*)?\.?([a-z0-9_]+)?\]", reference
-        )
-        if not match:
-            continue
-
-        class_name, member = match[1], match[2]
-
-        if class_name and class_name not in classes.class_index:
-            LOGGER.warning(ERROR_MESSAGES["class"].format(class_name) + ERROR_TAIL)
-            continue
-
-        if member and class_name:
-            if member not in classes.class_index[class_name]:
-                LOGGER.warning(
-                    ERROR_MESSAGES["member"].format(member, class_name) + ERROR_TAIL
-                )
-                continue
-        elif member and member not in classes.class_index[gdscript.name]:
-            LOGGER.warning(
-                ERROR_MESSAGES["member"].format(member, gdscript.name) + ERROR_TAIL
-            )
-            continue
-
-        display_text, path = "", "../"
-        if class_name:
-            display_text, path = class_name, class_name
-        if class_name and member:
-            display_text += "."
-            path += "/"
-        if member:
-            display_text += member
-            path += "#" + member.replace("_", "-")
-
-        link: str = make_link(display_text, path)
-        description = description.replace(reference, link, 1)
-    return description
+    return classes.reference_resolver.replace_references(description, gdscript.name)
@@ -0,0 +1,125 @@
+"""Finds references to classes and symbols in descriptions, like [ClassName],
+[symbol], and [ClassName.symbol], and replaces them with markdown links.
+
+Descriptions are processed one line at a time in a single pass. On each line, the
+reference candidate spans from the first opening bracket to the last closing bracket,
+and only its leading [ClassName.symbol] part becomes a link.
+"""
+import re
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .config import LOGGER
+from .make_markdown import make_link
+
+# Matches [ClassName], [symbol], and [ClassName.symbol]
+PATTERN_REFERENCE = re.compile(r"\[([A-Z][a-zA-Z0-9]*)?\.?([a-z0-9_]+)?\]")
+
+ERROR_MESSAGES = {
+    "class": "Class {} not found in the class index.",
+    "member": "Symbol {} not found in {}. The name might be incorrect.",
+}
+ERROR_TAIL = "The name might be incorrect."
+# Longer reference candidates span several references or words and rarely repeat.
+MAX_CACHED_CANDIDATE_LENGTH: int = 80
+
+
+class ReferenceResolver:
+    """Replaces references in descriptions with links, looking up class names and
+    symbols in `class_index`, a dictionary mapping class names to their set of
+    symbols, like `GDScriptClasses.class_index`."""
+
+    def __init__(self, class_index: Dict[str, Set[str]]):
+        self.class_index: Dict[str, Set[str]] = class_index
+        # Maps (reference candidate, class name) pairs to the resulting link, or to
+        # the warning to log if the reference is invalid.
+        self._links: Dict[Tuple[str, str], Tuple[Optional[str], str]] = {}
+
+    def replace_references(self, description: str, class_name: str) -> str:
+        """Returns the description with its references replaced by links. References
+        without a class name point to symbols of the class `class_name`."""
+        if "[" not in description:
+            return description
+
+        lines: List[str] = description.split("\n")
+        for index, line in enumerate(lines):
+            start: int = line.find("[")
+            if start == -1:
+                continue
+            end: int = line.rfind("]") + 1
+            if end < start + 3:
+                continue
+
+            key: Tuple[str, str] = (line[start:end], class_name)
+            result: Optional[Tuple[Optional[str], str]] = self._links.get(key)
+            if result is None:
+                result = self._make_link(key[0], class_name)
+                if end - start <= MAX_CACHED_CANDIDATE_LENGTH:
+                    self._links[key] = result
+            link, warning = result
+            if warning:
+                LOGGER.warning(warning)
+            if link is not None:
+                lines[index] = line[:start] + link + line[end:]
+        return "\n".join(lines)
+
+    def _make_link(self, candidate: str, class_name: str) -> Tuple[Optional[str], str]:
+        """Returns the link for the reference candidate and an empty string, or `None`
+        and a warning message if the candidate isn't a valid reference."""
+        match = PATTERN_REFERENCE.match(candidate)
+        if not match:
+            return None, ""
+
+        reference_class, member = match[1], match[2]
+        if reference_class and reference_class not in self.class_index:
+            return None, ERROR_MESSAGES["class"].format(reference_class) + ERROR_TAIL
+
+        if member and reference_class:
+            if member not in self.class_index[reference_class]:
+                return (
+                    None,
+                    ERROR_MESSAGES["member"].format(member, reference_class)
+                    + ERROR_TAIL,
+                )
+        elif member and member not in self.class_index.get(class_name, ()):
+            return (
+                None,
+                ERROR_MESSAGES["member"].format(member, class_name) + ERROR_TAIL,
+            )
+
+        display_text, path = "", "../"
+        if reference_class:
+            display_text, path = reference_class, reference_class
+        if reference_class and member:
+            display_text += "."
+            path += "/"
+        if member:
+            display_text += member
+            path += "#" + member.replace("_", "-")
+        return make_link(display_text, path), ""
+
+
+def iter_referenced_classes(description: str) -> Iterator[str]:
+    """Yields the class names of the [ClassName] and [ClassName.symbol] references in
+    the description, whether the classes exist or not."""
+    if "[" not in description:
+        return
+    for line in description.split("\n"):
+        span: Optional[Tuple[int, int]] = _find_candidate(line)
+        if not span:
+            continue
+        match = PATTERN_REFERENCE.match(line, *span)
+        if match and match[1]:
+            yield match[1]
+
+
+def _find_candidate(line: str) -> Optional[Tuple[int, int]]:
+    """Returns the start and end of the reference candidate in the line: the text
+    from the first opening bracket to the last closing bracket, with at least one
+    character between them."""
+    start: int = line.find("[")
+    if start == -1:
+        return None
+    end: int = line.rfind("]") + 1
+    if end < start + 3:
+        return None
+    return start, end
@@ -1,13 +1,18 @@
 """Converts the json representation of GDScript classes as dictionaries into objects
+
+The classes declare `__slots__` and intern the names and types they hold, which repeat
+across the project, to keep large projects small in memory.
 """
 import itertools
 import operator
 import re
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, field
 from enum import Enum
-from operator import itemgetter
-from typing import List, Tuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
+from .config import LOGGER
+from .cross_references import ReferenceResolver, iter_referenced_classes
 from .make_markdown import make_bold, make_code_inline, make_list, surround_with_html
 from .utils import build_re_pattern
 
@@ -35,14 +40,31 @@ BUILTIN_VIRTUAL_CALLBACKS = [
 
 TYPE_CONSTRUCTOR = "_init"
 
+PATTERN_TAGS = re.compile(build_re_pattern("tags"))
+PATTERN_CATEGORY = re.compile(build_re_pattern("category"))
 
-@dataclass
+
+@dataclass(frozen=True)
 class Metadata:
-    """Container for metadata for Elements"""
+    """Container for metadata for Elements. Immutable, so that elements without
+    metadata can share `EMPTY_METADATA`."""
+
+    __slots__ = ("tags", "category")
 
-    tags: List[str]
+    tags: Tuple[str, ...]
     category: str
 
+    def __reduce__(self):
+        # Pickle restores slots by assigning them, which frozen dataclasses forbid.
+        return _make_metadata, (self.tags, self.category)
+
+
+EMPTY_METADATA = Metadata((), "")
+
+
+def _make_metadata(tags: Tuple[str, ...], category: str) -> Metadata:
+    return Metadata(tags, category) if tags or category else EMPTY_METADATA
+
 
 def extract_metadata(description: str) -> Tuple[str, Metadata]:
     """Finds metadata keys in the provided description and returns the description
@@ -50,30 +72,40 @@ without the corresponding lines, as well as the metadata. In the source text,
 Metadata should be of the form key: value, e.g. category: Category Name
 
     """
-    tags: List[str] = []
+    tags: Tuple[str, ...] = ()
     category: str = ""
 
-    lines: List[str] = description.split("\n")
-    description_trimmed: List[str] = []
+    if "@" not in description:
+        description_trimmed: str = "\n".join(map(_trim_line, description.split("\n")))
+        return description_trimmed, EMPTY_METADATA
 
-    pattern_tags = build_re_pattern("tags")
-    pattern_category = build_re_pattern("category")
+    lines_trimmed: List[str] = []
+    for line in description.split("\n"):
+        line_stripped: str = line.strip()
 
-    for _, line in enumerate(lines):
-        line_stripped: str = line.strip().lower()
+        # Only lines starting with @ can hold metadata.
+        if line_stripped.startswith("@"):
+            line_stripped = line_stripped.lower()
+            match_tags = PATTERN_TAGS.match(line_stripped)
+            if match_tags:
+                tags = tuple(
+                    sys.intern(tag.strip()) for tag in match_tags.group(1).split(",")
+                )
+                continue
+            match_category = PATTERN_CATEGORY.match(line_stripped)
+            if match_category:
+                category = sys.intern(match_category.group(1) or "")
+                continue
 
-        match_tags = re.match(pattern_tags, line_stripped)
-        match_category = re.match(pattern_category, line_stripped)
-        if match_tags:
-            tags = match_tags.group(1).split(",")
-            tags = list(map(lambda t: t.strip(), tags))
-        elif match_category:
-            category = match_category.group(1)
-        else:
-            description_trimmed.append(re.sub('^ ', '', line).rstrip())
+        lines_trimmed.append(_trim_line(line))
 
-    metadata: Metadata = Metadata(tags, category)
-    return "\n".join(description_trimmed), metadata
+    return "\n".join(lines_trimmed), _make_metadata(tags, category)
+
+
+def _trim_line(line: str) -> str:
+    """Removes one leading space, left by the comment character, and the trailing
+    whitespace of a description line."""
+    return line[1:].rstrip() if line.startswith(" ") else line.rstrip()
 
 
 class FunctionTypes(Enum):
@@ -84,6 +116,8 @@ class FunctionTypes(Enum):
 
 @dataclass
 class ProjectInfo:
+    __slots__ = ("name", "description", "version")
+
     name: str
     description: str
     version: str
@@ -98,11 +132,14 @@ class Element:
     """Base type for all main GDScript symbol types. Contains properties common to
 Signals, Functions, Member variables, etc."""
 
+    __slots__ = ("signature", "name", "description", "metadata")
+
     signature: str
     name: str
     description: str
 
     def __post_init__(self):
+        self.name = sys.intern(self.name)
         _description, self.metadata = extract_metadata(self.description)
         self.description = _description.strip("\n")
 
@@ -123,12 +160,17 @@ unique attributes of this element."""
 
 @dataclass
 class Signal(Element):
+    __slots__ = ("arguments",)
+
     arguments: List[str]
 
     @staticmethod
     def from_dict(data: dict) -> "Signal":
         return Signal(
-            data["signature"], data["name"], data["description"], data["arguments"],
+            data["signature"],
+            data["name"],
+            data["description"],
+            [sys.intern(argument) for argument in data["arguments"]],
         )
 
 
@@ -136,12 +178,16 @@ class Signal(Element):
 class Argument:
     """Container for function arguments."""
 
+    __slots__ = ("name", "type")
+
     name: str
     type: str
 
 
 @dataclass
 class Function(Element):
+    __slots__ = ("kind", "return_type", "arguments", "rpc_mode")
+
     kind: FunctionTypes
     return_type: str
     arguments: List[Argument]
@@ -150,7 +196,9 @@ class Function(Element):
     def __post_init__(self):
         super().__post_init__()
         self.signature = self.signature.replace("-> null", "-> void", 1)
-        self.return_type = self.return_type.replace("null", "void", 1)
+        self.return_type = sys.intern(self.return_type.replace("null", "void", 1))
+        if self.kind == FunctionTypes.METHOD and "virtual" in self.metadata.tags:
+            self.kind = FunctionTypes.VIRTUAL
 
     def summarize(self) -> List[str]:
         return [self.return_type, self.signature]
@@ -166,18 +214,14 @@ the element as a markdown heading."""
         return heading
 
     @staticmethod
-    def from_dict(data: dict) -> "Function":
-        kind: FunctionTypes = FunctionTypes.METHOD
-        if data["is_static"]:
-            kind = FunctionTypes.STATIC
-        elif data["is_virtual"]:
-            kind = FunctionTypes.VIRTUAL
-
+    def from_dict(data: dict, is_static: bool = False) -> "Function":
+        """Returns a function built from its source data. Methods tagged as virtual in
+        their description become virtual functions."""
         return Function(
             data["signature"],
             data["name"],
             data["description"],
-            kind,
+            FunctionTypes.STATIC if is_static else FunctionTypes.METHOD,
             data["return_type"],
             Function._get_arguments(data["arguments"]),
             data["rpc_mode"] if "rpc_mode" in data else 0,
@@ -185,13 +229,18 @@ the element as a markdown heading."""
 
     @staticmethod
     def _get_arguments(data: List[dict]) -> List[Argument]:
-        return [Argument(entry["name"], entry["type"],) for entry in data]
+        return [
+            Argument(sys.intern(entry["name"]), sys.intern(entry["type"]))
+            for entry in data
+        ]
 
 
 @dataclass
 class Enumeration(Element):
     """Represents an enum with its constants"""
 
+    __slots__ = ("values",)
+
     values: dict
 
     @staticmethod
@@ -205,6 +254,8 @@ class Enumeration(Element):
 class Member(Element):
     """Represents a property or member variable"""
 
+    __slots__ = ("type", "default_value", "is_exported", "setter", "getter")
+
     type: str
     default_value: str
     is_exported: bool
@@ -231,11 +282,11 @@ class Member(Element):
             data["signature"],
             data["name"],
             data["description"],
-            data["data_type"],
+            sys.intern(data["data_type"]),
             data["default_value"],
             data["export"],
-            data["setter"],
-            data["getter"],
+            sys.intern(data["setter"]),
+            sys.intern(data["getter"]),
         )
 
 
@@ -243,6 +294,8 @@ class Member(Element):
 class Constant(Element):
     """Represents a constant"""
 
+    __slots__ = ("type", "default_value")
+
     type: str
     default_value: str
 
@@ -255,13 +308,29 @@ class Constant(Element):
             data["signature"],
             data["name"],
             data["description"],
-            data["data_type"],
+            sys.intern(data["data_type"]),
             data["value"],
         )
 
 
 @dataclass
 class GDScriptClass:
+    __slots__ = (
+        "name",
+        "extends",
+        "description",
+        "path",
+        "functions",
+        "members",
+        "constants",
+        "signals",
+        "enums",
+        "sub_classes",
+        "metadata",
+        "symbols",
+        "source_hash",
+    )
+
     name: str
     extends: str
     description: str
@@ -279,32 +348,39 @@ class GDScriptClass:
 
         elements = self.functions + self.members + self.signals + self.enums
         self.symbols = {element.name for element in elements}
+        # Hash of the source data, set by the reference file loader on demand.
+        self.source_hash: str = ""
 
     @staticmethod
     def from_dict(data: dict):
         # the extends_class field is a list in json even though it only has one
         # class.
         extends: str = data["extends_class"][0] if data["extends_class"] else ""
+        constants, enums = _get_constants_and_enums(data["constants"])
         return GDScriptClass(
-            data["name"],
-            extends,
+            sys.intern(data["name"]),
+            sys.intern(extends),
             data["description"],
             data["path"],
             _get_functions(data["methods"])
             + _get_functions(data["static_functions"], is_static=True),
             _get_members(data["members"]),
-            _get_constants(data["constants"]),
+            constants,
             _get_signals(data["signals"]),
-            [
-                Enumeration.from_dict(entry)
-                for entry in data["constants"]
-                if entry["data_type"] == "Dictionary"
-                and all(isinstance(v, int) for v in entry["value"].values())
-                and not entry["name"].startswith("_")
-            ],
+            enums,
             [GDScriptClass.from_dict(data) for data in data["sub_classes"]],
         )
 
+    def iter_descriptions(self) -> Iterator[str]:
+        """Yields the descriptions of the class, of its symbols, and of its
+        sub-classes."""
+        yield self.description
+        for attribute in ["functions", "members", "constants", "signals", "enums"]:
+            for element in getattr(self, attribute):
+                yield element.description
+        for sub_class in self.sub_classes:
+            yield from sub_class.iter_descriptions()
+
     def get_extends_tree(self, classes: "GDScriptClasses") -> List[str]:
         """Returns the list of ancestors for this class, starting from self.extends.
 
@@ -314,12 +390,52 @@ class GDScriptClass:
           of.
 
         """
-        extends: str = self.extends
-        extends_tree: List[str] = []
-        while extends != "":
-            extends_tree.append(extends)
-            extends = next((cls.extends for cls in classes if cls.name == extends), "")
-        return extends_tree
+        return list(classes.get_inheritance_chain(self.extends))
+
+
+@dataclass
+class GDScriptClassSummary:
+    """Holds the data other pages need from a GDScriptClass to link to it and list
+    its ancestors, without its elements and descriptions."""
+
+    __slots__ = ("name", "extends", "metadata", "symbols")
+
+    name: str
+    extends: str
+    metadata: Metadata
+    symbols: set
+
+    @staticmethod
+    def from_class(gdscript: GDScriptClass) -> "GDScriptClassSummary":
+        return GDScriptClassSummary(
+            gdscript.name, gdscript.extends, gdscript.metadata, gdscript.symbols
+        )
+
+
+@dataclass
+class ReverseReferences:
+    """Maps class names to the names of the classes that directly inherit from them,
+    and to the names of the classes whose descriptions link to them, in the order the
+    classes were added."""
+
+    inherited_by: Dict[str, List[str]] = field(default_factory=dict)
+    referenced_by: Dict[str, List[str]] = field(default_factory=dict)
+
+    def add_class(self, gdscript: GDScriptClass) -> None:
+        if gdscript.extends:
+            self.inherited_by.setdefault(gdscript.extends, []).append(gdscript.name)
+        referenced: Set[str] = set()
+        for description in gdscript.iter_descriptions():
+            referenced.update(iter_referenced_classes(description))
+        referenced.discard(gdscript.name)
+        for name in sorted(referenced):
+            self.referenced_by.setdefault(name, []).append(gdscript.name)
+
+    def get_inherited_by(self, name: str) -> List[str]:
+        return self.inherited_by.get(name, [])
+
+    def get_referenced_by(self, name: str) -> List[str]:
+        return self.referenced_by.get(name, [])
 
 
 class GDScriptClasses(list):
@@ -332,22 +448,93 @@ class GDScriptClasses(list):
         self.class_index = {
             gdscript_class.name: gdscript_class.symbols for gdscript_class in self
         }
+        self.reference_resolver = ReferenceResolver(self.class_index)
+
+        # If several classes share a name, the first one defines the inheritance.
+        self._classes_by_name: Dict[str, GDScriptClass] = {}
+        for gdscript_class in self:
+            self._classes_by_name.setdefault(gdscript_class.name, gdscript_class)
+        # Maps class names to the chain of the class and its ancestors. Sibling
+        # classes share their parent's chain.
+        self._inheritance_chains: Dict[str, Tuple[str, ...]] = {}
+        for gdscript_class in self:
+            self.get_inheritance_chain(gdscript_class.extends)
+        # Built on the first call to get_reverse_references(). Lists of
+        # GDScriptClassSummary objects, which have no descriptions, need it set from
+        # the full classes.
+        self.reverse_references: Optional[ReverseReferences] = None
+        # Groups of classes by attribute, built on the first call to
+        # _get_grouped_by().
+        self._groups: Dict[str, List[List[GDScriptClass]]] = {}
+
+    def get_class(self, name: str) -> Optional[GDScriptClass]:
+        """Returns the first class named `name`, or `None` if there is none."""
+        return self._classes_by_name.get(name)
+
+    def get_ancestors(self, name: str) -> Tuple[str, ...]:
+        """Returns the names of the ancestors of the class `name`, starting with its
+        parent class. The last ancestor can be a class that isn't part of the list,
+        like a built-in Godot class."""
+        gdscript_class: Optional[GDScriptClass] = self.get_class(name)
+        if not gdscript_class:
+            return ()
+        return self.get_inheritance_chain(gdscript_class.extends)
+
+    def get_inheritance_chain(self, name: str) -> Tuple[str, ...]:
+        """Returns a tuple with `name` followed by the names of its ancestors, or an
+        empty tuple if `name` is empty."""
+        if not name or name in self._inheritance_chains:
+            return self._inheritance_chains.get(name, ())
+
+        # Walk up to the first ancestor with a known chain, then build the chains of
+        # the classes in between from the top down.
+        path: List[str] = []
+        ancestor: str = name
+        while ancestor and ancestor not in self._inheritance_chains:
+            if ancestor in path:
+                LOGGER.warning(
+                    "Class {} inherits from itself through {}.".format(
+                        ancestor, " < ".join(path)
+                    )
+                )
+                break
+            path.append(ancestor)
+            parent: Optional[GDScriptClass] = self.get_class(ancestor)
+            ancestor = parent.extends if parent else ""
+
+        chain: Tuple[str, ...] = self._inheritance_chains.get(ancestor, ())
+        for ancestor in reversed(path):
+            chain = (ancestor,) + chain
+            self._inheritance_chains[ancestor] = chain
+        return chain
+
+    def get_reverse_references(self) -> ReverseReferences:
+        """Returns the classes that inherit from and link to each class, building
+        them in a single pass over the classes on the first call."""
+        if self.reverse_references is None:
+            self.reverse_references = ReverseReferences()
+            for gdscript_class in self:
+                self.reverse_references.add_class(gdscript_class)
+        return self.reverse_references
 
     def _get_grouped_by(self, attribute: str) -> List[List[GDScriptClass]]:
-        if not self or attribute not in self[0].__dict__:
-            return []
-
-        groups = []
-        get_attribute = operator.attrgetter(attribute)
-        data = sorted(self, key=get_attribute)
-        for key, group in itertools.groupby(data, get_attribute):
-            groups.append(list(group))
+        """Returns the classes grouped by the value of `attribute`, which can be a
+        dotted path like `metadata.category`, in the order of the values. Classes keep
+        their order within a group. Groups the classes on the first call only."""
+        groups: Optional[List[List[GDScriptClass]]] = self._groups.get(attribute)
+        if groups is None:
+            get_attribute = operator.attrgetter(attribute)
+            data: List[GDScriptClass] = sorted(self, key=get_attribute)
+            groups = [
+                list(group) for _, group in itertools.groupby(data, get_attribute)
+            ]
+            self._groups[attribute] = groups
         return groups
 
     def get_grouped_by_category(self) -> List[List[GDScriptClass]]:
-        """Returns a list of lists of GDScriptClass objects, grouped by their `category`
-attribute"""
-        return self._get_grouped_by("category")
+        """Returns a list of lists of GDScriptClass objects, grouped by their
+        category, with the classes without a category first."""
+        return self._get_grouped_by("metadata.category")
 
     @staticmethod
     def from_dict_list(data: List[dict]):
@@ -372,20 +559,16 @@ inclusion, and private methods."""
         if name == TYPE_CONSTRUCTOR and not entry["arguments"]:
             continue
 
-        _, metadata = extract_metadata(entry["description"])
-
-        is_virtual: bool = "virtual" in metadata.tags and not is_static
-        is_private: bool = name.startswith(
-            "_"
-        ) and not is_virtual and name != TYPE_CONSTRUCTOR
-        if is_private:
+        # Private methods are only listed if they are tagged as virtual, which
+        # requires an @tags line in their description.
+        is_private: bool = name.startswith("_") and name != TYPE_CONSTRUCTOR
+        if is_private and (is_static or "@" not in entry["description"]):
             continue
 
-        function_data: dict = entry
-        function_data["is_virtual"] = is_virtual
-        function_data["is_static"] = is_static
-
-        functions.append(Function.from_dict(function_data))
+        function: Function = Function.from_dict(entry, is_static)
+        if is_private and function.kind != FunctionTypes.VIRTUAL:
+            continue
+        functions.append(function)
     return functions
 
 
@@ -395,19 +578,22 @@ def _get_members(data: List[dict]) -> List[Member]:
     ]
 
 
-def _get_constants(constants_data: List[dict]) -> List[Constant]:
-    """Filters and distinguishes constants from enums."""
-
-    def is_not_enum(constant):
-        """Returns `True` if the constant's source data doesn't correspond to an enum.
-        That is, if it's not a dictionary with only a list of named integers."""
-        is_enum = constant["data_type"] == "Dictionary"
-        is_enum = is_enum and all(
-            isinstance(value, int) for value in constant["value"].values()
+def _get_constants_and_enums(
+    constants_data: List[dict],
+) -> Tuple[List[Constant], List[Enumeration]]:
+    """Filters and distinguishes constants from enums in a single pass. Enums are
+    dictionaries with only a list of named integers."""
+    constants: List[Constant] = []
+    enums: List[Enumeration] = []
+    for entry in constants_data:
+        if entry["name"].startswith("_"):
+            continue
+        is_enum: bool = entry["data_type"] == "Dictionary" and all(
+            isinstance(value, int) for value in entry["value"].values()
         )
-        return not is_enum
-
-    constants = filter(lambda c: not c["name"].startswith("_"), constants_data)
-    constants = filter(is_not_enum, constants)
-    constants = sorted(constants, key=itemgetter("name"))
-    return list(map(lambda c: Constant.from_dict(c), constants))
+        if is_enum:
+            enums.append(Enumeration.from_dict(entry))
+        else:
+            constants.append(Constant.from_dict(entry))
+    constants.sort(key=operator.attrgetter("name"))
+    return constants, enums
@@ -1,51 +1,5 @@
 """Functions to format the markdown output for the static website engine hugo.
 """
-import datetime
-from argparse import Namespace
-from dataclasses import dataclass
-from typing import List
-
-from .config import HUGO_FRONT_MATTER, LOGGER
-from .gdscript_objects import GDScriptClass
-
-
-@dataclass
-class HugoFrontMatter:
-    """Container for required front matter data for export to hugo-friendly
-markdown"""
-
-    title: str
-    description: str
-    author: str
-    date: datetime.date
-
-    def as_string_list(self) -> List[str]:
-        strings: List[str] = [
-            self.title,
-            self.description,
-            self.author,
-            "{:%Y-%m-%d}".format(self.date),
-        ]
-        LOGGER.debug("Hugo front matter:\n" + repr(strings))
-        strings = list(map(quote_string, strings))
-        return [HUGO_FRONT_MATTER["toml"].format(*strings) + "\n"]
-
-    @classmethod
-    def from_data(cls, gdscript: GDScriptClass, arguments: Namespace):
-        name: str = gdscript.name
-        if "abstract" in gdscript.metadata.tags:
-            name += " (abstract)"
-        return HugoFrontMatter(
-            name,
-            gdscript.description.replace("\n", "\\n"),
-            arguments.author,
-            arguments.date,
-        )
-
-
-FRONT_MATTER_DEFAULT: HugoFrontMatter = HugoFrontMatter(
-    "", "", "", datetime.date.today()
-)
 
 
 def make_relref(target_document: str, language: str = "gdscript") -> str:
@@ -0,0 +1,156 @@
+"""Cache to only convert the classes that changed since the previous run, and the
+classes whose pages depend on them.
+
+The cache lives in the output directory. For every class of every reference file, it
+stores a hash of the class's source data and the names of the classes its page
+depends on: its ancestors, which appear in its inheritance tree, and the classes its
+descriptions link to.
+"""
+import copy
+import hashlib
+import json
+import os
+from argparse import Namespace
+from typing import Dict, List, Set
+
+from .config import LOGGER
+from .convert_to_markdown import get_page_filenames
+from .cross_references import iter_referenced_classes
+from .gdscript_objects import GDScriptClass, GDScriptClasses
+from .templates import PageLayout, get_layout
+from .utils import get_version
+
+CACHE_FILENAME: str = ".gdscript_docs_maker_cache.json"
+# Increment when the format of the cache or of the generated pages changes.
+CACHE_VERSION: int = 1
+
+
+class BuildCache:
+    """Tracks the source hash and the dependencies of every generated page.
+
+    Arguments:
+
+    - dirpath: path to the output directory.
+    - arguments: command line arguments. Changing the ones that affect the output
+      invalidates the whole cache.
+
+    """
+
+    def __init__(self, dirpath: str, arguments: Namespace):
+        self.dirpath: str = dirpath
+        self.path: str = os.path.join(dirpath, CACHE_FILENAME)
+        self.settings: str = _hash_settings(arguments)
+        self.reverse_references: bool = arguments.reverse_references
+        self.arguments: Namespace = arguments
+        self.files: Dict[str, Dict[str, dict]] = {}
+
+        data: dict = {}
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path, "r") as file_in:
+                    data = json.load(file_in)
+            except ValueError:
+                LOGGER.warning("Invalid cache file {}, ignoring it.".format(self.path))
+        if (
+            data.get("version") == CACHE_VERSION
+            and data.get("settings") == self.settings
+        ):
+            self.files = data["files"]
+
+    def update(self, path: str, classes: GDScriptClasses) -> List[GDScriptClass]:
+        """Updates the cache entries of the reference file at `path` and returns the
+        classes that need to be converted again.
+
+        The classes must have their `source_hash` set."""
+        key: str = os.path.normpath(path)
+        previous: Dict[str, dict] = self.files.get(key, {})
+        entries: Dict[str, dict] = {}
+        # The ancestors of a class change when any class of its inheritance tree
+        # changes, so the dependencies of every class are found again.
+        for gdscript in classes:
+            entries[gdscript.name] = {
+                "hash": gdscript.source_hash,
+                "dependencies": sorted(get_dependencies(classes, gdscript)),
+            }
+
+        changed: Set[str] = {
+            name
+            for name in previous.keys() | entries.keys()
+            if previous.get(name, {}).get("hash") != entries.get(name, {}).get("hash")
+        }
+        # Pages that list the classes inheriting from or linking to them also depend
+        # on the classes whose dependencies they are, before and after the change.
+        referenced: Set[str] = set()
+        if self.reverse_references:
+            for name in changed:
+                referenced.update(previous.get(name, {}).get("dependencies", []))
+                referenced.update(entries.get(name, {}).get("dependencies", []))
+        outdated: List[GDScriptClass] = [
+            gdscript
+            for gdscript in classes
+            if gdscript.name in changed
+            or gdscript.name in referenced
+            or not changed.isdisjoint(entries[gdscript.name]["dependencies"])
+            or not self._has_pages(gdscript.name)
+        ]
+        self.files[key] = entries
+        LOGGER.info(
+            "{} of {} classes changed, converting {} classes".format(
+                len(changed & entries.keys()), len(classes), len(outdated)
+            )
+        )
+        return outdated
+
+    def _has_pages(self, name: str) -> bool:
+        """Returns `True` if the pages of the class `name` exist in every output
+        format."""
+        return all(
+            os.path.isfile(os.path.join(self.dirpath, filename))
+            for filename in get_page_filenames(self.arguments, name)
+        )
+
+    def split(self, path: str) -> "BuildCache":
+        """Returns a copy of the cache that only holds the entries of the reference
+        file at `path`, to update it in a worker process."""
+        cache: BuildCache = copy.copy(self)
+        key: str = os.path.normpath(path)
+        cache.files = {key: self.files[key]} if key in self.files else {}
+        return cache
+
+    def merge(self, cache: "BuildCache") -> None:
+        """Copies the entries of a cache returned by `split()` into this one."""
+        self.files.update(cache.files)
+
+    def save(self) -> None:
+        data: dict = {
+            "version": CACHE_VERSION,
+            "settings": self.settings,
+            "files": self.files,
+        }
+        with open(self.path, "w") as file_out:
+            json.dump(data, file_out)
+
+
+def get_dependencies(classes: GDScriptClasses, gdscript: GDScriptClass) -> Set[str]:
+    """Returns the names of the classes the page of `gdscript` depends on: its
+    ancestors and the classes it links to."""
+    dependencies: Set[str] = set(gdscript.get_extends_tree(classes))
+    for description in gdscript.iter_descriptions():
+        dependencies.update(iter_referenced_classes(description))
+    dependencies.discard(gdscript.name)
+    return dependencies
+
+
+def _hash_settings(arguments: Namespace) -> str:
+    settings: list = [
+        CACHE_VERSION,
+        get_version(),
+        [output_format.value for output_format in arguments.formats],
+        arguments.reverse_references,
+    ]
+    # The author and the date only appear on pages through the layouts, which have
+    # them filled in. So a new date only invalidates the cache if a layout uses it.
+    for output_format in arguments.formats:
+        layout: PageLayout = get_layout(arguments, output_format)
+        settings.append([layout.header, layout.footer])
+    return hashlib.sha1(json.dumps(settings).encode("utf-8")).hexdigest()
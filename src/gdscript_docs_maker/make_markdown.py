@@ -2,7 +2,83 @@
 """
 import re
 from dataclasses import dataclass
-from typing import List, Any
+from typing import Callable, Iterable, List, Optional, TextIO
+
+PATTERN_EMPTY_LINES = re.compile(r"\n\n+")
+
+
+class MarkdownWriter:
+    """Writes a markdown document line by line, to a string or straight to a file.
+
+    Removes duplicate empty lines as it goes: the output is the same as joining all
+    the lines with newlines and replacing every run of empty lines with a single one.
+    Call `getvalue()` to get the document when writing to a string.
+
+    Arguments:
+
+    - file_out: an open file to write the document to. If `None`, the writer stores
+      the document in memory.
+
+    """
+
+    def __init__(self, file_out: Optional[TextIO] = None):
+        self._chunks: List[str] = []
+        self._write: Callable[[str], object] = (
+            file_out.write if file_out is not None else self._chunks.append
+        )
+        self._is_started: bool = False
+        # Number of newline characters at the end of the output, at most 2.
+        self._newlines: int = 0
+
+    def write_line(self, line: str = "") -> None:
+        if not self._is_started:
+            self._is_started = True
+        elif self._newlines < 2:
+            self._write("\n")
+            self._newlines += 1
+        if not line:
+            return
+
+        text: str = line
+        if text[0] == "\n":
+            text = text.lstrip("\n")
+            self._write_newlines(len(line) - len(text))
+            if not text:
+                return
+        if "\n" not in text:
+            self._newlines = 0
+        else:
+            if "\n\n\n" in text:
+                text = PATTERN_EMPTY_LINES.sub("\n\n", text)
+            self._newlines = 2 if text.endswith("\n\n") else int(text[-1] == "\n")
+        self._write(text)
+
+    def write_lines(self, lines: Iterable[str]) -> None:
+        for line in lines:
+            self.write_line(line)
+
+    def write_heading(self, line: str, level: int = 1) -> None:
+        """Writes the line as a markdown heading, surrounded by two empty lines, like
+        writing the lines of `make_heading()`."""
+        heading: str = "#" * level + " " + escape_markdown(line)
+        if "\n" in heading:
+            self.write_lines(["", heading, ""])
+            return
+        self._write_newlines(2 if self._is_started else 1)
+        self._write(heading + "\n")
+        self._newlines = 1
+        self._is_started = True
+
+    def getvalue(self) -> str:
+        return "".join(self._chunks)
+
+    def _write_newlines(self, count: int) -> None:
+        """Writes up to `count` newline characters, leaving at most two at the end of
+        the output."""
+        if self._newlines < 2:
+            newlines: int = 2 if self._newlines + count > 2 else self._newlines + count
+            self._write("\n" * (newlines - self._newlines))
+            self._newlines = newlines
 
 
 @dataclass
@@ -16,8 +92,13 @@ class MarkdownDocument:
     def as_string(self) -> str:
         """Removes duplicate empty lines from the document and returns it as a
 string."""
-        text: str = "\n".join(self.content)
-        return re.sub(r"\n\n+", "\n\n", text)
+        writer: MarkdownWriter = MarkdownWriter()
+        writer.write_lines(self.content)
+        return writer.getvalue()
+
+    def write(self, file_out: TextIO) -> None:
+        """Writes the document to the open file `file_out`, like `as_string()`."""
+        MarkdownWriter(file_out).write_lines(self.content)
 
     def __repr__(self):
         return "MarkdownDocument(title={}, content={})".format(
@@ -43,6 +124,12 @@ class MarkdownSection:
     def as_text(self) -> List[str]:
         return self.title + self.content if not self.is_empty() else []
 
+    def write(self, writer: MarkdownWriter) -> None:
+        """Writes the section to `writer`, like `as_text()`."""
+        if not self.is_empty():
+            writer.write_lines(self.title)
+            writer.write_lines(self.content)
+
 
 def wrap_in_newlines(markdown: List[str] = []) -> List[str]:
     return ["", *markdown, ""]
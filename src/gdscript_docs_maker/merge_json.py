@@ -2,12 +2,361 @@
 reference data file.
 
 Use this to update and extend docstrings from the Godot source code.
+
+The merge matches classes by name, or by path for renamed classes, and the symbols of
+a class by kind and name, like the `methods` named `move`. The data from Godot
+replaces the data of the edited file, except for descriptions: a non-empty
+description in the edited file stays. Classes, symbols, and fields that only exist in
+the edited file also stay, unless pruning them.
+
+Usage: python -m gdscript_docs_maker.merge_json reference.json edited.json -o out.json
 """
+import argparse
 import json
+import os
+import sys
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Set, TextIO, Tuple, Union
+
+from .reference_file import iter_reference
+from .sync import get_file_mode
+
+# Fields of the edited file that take precedence over Godot's when they're not empty.
+EDITABLE_FIELDS: Tuple[str, ...] = ("description",)
+# Lists of symbols in class dictionaries, matched by the name of the symbols.
+SYMBOL_LISTS: Tuple[str, ...] = (
+    "constants",
+    "members",
+    "signals",
+    "methods",
+    "static_functions",
+)
+INDENT: int = 4
+
+
+class ClassMatcher:
+    """Merges classes from Godot with the matching classes of an edited reference.
+
+    Arguments:
+
+    - target_classes: the class dictionaries of the edited reference.
+    - prune: if `True`, drops the classes and symbols that don't exist in Godot's
+      reference.
 
+    """
 
-def merge_into(godot_json: str, target_json: str) -> str:
+    def __init__(self, target_classes: List[dict], prune: bool = False):
+        self.target_classes: List[dict] = target_classes
+        self.prune: bool = prune
+        self._by_name: Dict[str, dict] = {}
+        self._by_path: Dict[str, dict] = {}
+        for entry in target_classes:
+            self._by_name.setdefault(entry.get("name", ""), entry)
+            if entry.get("path"):
+                self._by_path.setdefault(entry["path"], entry)
+        # Identifiers of the edited classes already merged.
+        self._matched: Set[int] = set()
+
+    def merge(self, godot_class: dict) -> dict:
+        """Returns `godot_class` merged with the matching edited class, if any."""
+        target: Optional[dict] = self._by_name.get(godot_class.get("name", ""))
+        if target is None or id(target) in self._matched:
+            target = self._by_path.get(godot_class.get("path", ""))
+        if target is None or id(target) in self._matched:
+            return godot_class
+        self._matched.add(id(target))
+        if target == godot_class:
+            return godot_class
+        return _merge_class(godot_class, target, self.prune)
+
+    def iter_unmatched(self) -> Iterator[dict]:
+        """Yields the edited classes that no class from Godot matched, unless
+        pruning."""
+        if self.prune:
+            return
+        for entry in self.target_classes:
+            if id(entry) not in self._matched:
+                yield entry
+
+
+def merge_into(godot_json: str, target_json: str, prune: bool = False) -> str:
+    """Merges the Godot reference `godot_json` into the edited reference
+    `target_json` and returns the merged JSON document."""
     godot_data: dict = json.loads(godot_json)
     target_data: dict = json.loads(target_json)
-    merged_data: dict = {**target_data, **godot_data}
-    return json.dumps(merged_data, indent=4)
+    matcher: ClassMatcher = ClassMatcher(target_data.get("classes", []), prune)
+    classes: List[dict] = [
+        matcher.merge(entry) for entry in godot_data.get("classes", [])
+    ] + list(matcher.iter_unmatched())
+
+    merged_data: dict = {}
+    for key, value in godot_data.items():
+        merged_data[key] = (
+            classes
+            if key == "classes"
+            else _merge_values(key, value, target_data.get(key))
+        )
+    merged_data.setdefault("classes", classes)
+    for key, value in target_data.items():
+        merged_data.setdefault(key, value)
+    return json.dumps(merged_data, indent=INDENT)
+
+
+def merge_files(
+    godot_path: str,
+    target_path: str,
+    file_out: TextIO,
+    prune: bool = False,
+    ndjson: bool = False,
+) -> None:
+    """Merges the Godot reference file at `godot_path` into the edited reference
+    file at `target_path` and writes the merged reference to `file_out`.
+
+    Reads the Godot file one class at a time and writes each merged class right away,
+    so only the edited reference stays in memory. Both files can be JSON or
+    newline-delimited JSON. Writes the same JSON document as `merge_into()`, or
+    newline-delimited JSON if `ndjson` is `True`, which is several times faster to
+    write.
+
+    """
+    target_data: Dict[str, Any] = {}
+    target_classes: List[dict] = []
+    for key, value in iter_reference(target_path):
+        if key == "classes":
+            target_classes.append(value)
+        else:
+            target_data[key] = value
+    matcher: ClassMatcher = ClassMatcher(target_classes, prune)
+
+    writer: Union[_JSONWriter, _NDJSONWriter] = (
+        _NDJSONWriter(file_out, target_data) if ndjson else _JSONWriter(file_out)
+    )
+    godot_keys: Set[str] = set()
+    for key, value in iter_reference(godot_path):
+        if key == "classes":
+            if key not in godot_keys:
+                writer.start_list(key)
+            writer.write_item(matcher.merge(value))
+        else:
+            _close_classes(writer, matcher)
+            writer.write_field(key, _merge_values(key, value, target_data.get(key)))
+        godot_keys.add(key)
+
+    if "classes" not in godot_keys:
+        writer.start_list("classes")
+    _close_classes(writer, matcher)
+    for key, value in target_data.items():
+        if key not in godot_keys:
+            writer.write_field(key, value)
+    writer.finish()
+
+
+def _close_classes(
+    writer: Union["_JSONWriter", "_NDJSONWriter"], matcher: ClassMatcher
+) -> None:
+    """Writes the unmatched edited classes at the end of the list of classes, if the
+    writer is in it."""
+    if writer.is_in_list:
+        for entry in matcher.iter_unmatched():
+            writer.write_item(entry)
+        writer.end_list()
+
+
+def _merge_class(godot_class: dict, target_class: dict, prune: bool) -> dict:
+    merged: dict = _merge_fields(godot_class, target_class, prune)
+    for key in SYMBOL_LISTS:
+        if key in godot_class:
+            merged[key] = _merge_symbols(
+                godot_class[key], target_class.get(key, []), prune
+            )
+    if "sub_classes" in godot_class:
+        matcher: ClassMatcher = ClassMatcher(target_class.get("sub_classes", []), prune)
+        merged["sub_classes"] = [
+            matcher.merge(entry) for entry in godot_class["sub_classes"]
+        ] + list(matcher.iter_unmatched())
+    return merged
+
+
+def _merge_symbols(
+    godot_symbols: List[dict], target_symbols: List[dict], prune: bool
+) -> List[dict]:
+    """Merges two lists of symbols of the same kind, matching symbols by name."""
+    by_name: Dict[str, dict] = {}
+    for symbol in target_symbols:
+        by_name.setdefault(symbol.get("name", ""), symbol)
+    merged: List[dict] = []
+    names: Set[str] = set()
+    for symbol in godot_symbols:
+        name: str = symbol.get("name", "")
+        names.add(name)
+        target: Optional[dict] = by_name.get(name)
+        if target is None or target == symbol:
+            merged.append(symbol)
+        else:
+            merged.append(_merge_fields(symbol, target, prune))
+    if not prune:
+        merged.extend(s for s in target_symbols if s.get("name", "") not in names)
+    return merged
+
+
+def _merge_fields(godot_data: dict, target_data: dict, prune: bool) -> dict:
+    """Returns the fields of `godot_data`, replacing editable fields with the non-empty
+    ones of `target_data`, followed by the fields only `target_data` has unless
+    pruning."""
+    merged: dict = dict(godot_data)
+    for key in EDITABLE_FIELDS:
+        if key in merged and target_data.get(key):
+            merged[key] = target_data[key]
+    if not prune and not target_data.keys() <= merged.keys():
+        for key, value in target_data.items():
+            merged.setdefault(key, value)
+    return merged
+
+
+def _merge_values(key: str, godot_value: Any, target_value: Any) -> Any:
+    if key in EDITABLE_FIELDS and target_value:
+        return target_value
+    return godot_value
+
+
+class _JSONWriter:
+    """Writes a JSON object field by field, with the same layout as `json.dumps()`
+    with an indent, and the items of one list field at a time."""
+
+    def __init__(self, file_out: TextIO):
+        self.file_out: TextIO = file_out
+        self.is_in_list: bool = False
+        self._fields_count: int = 0
+        self._items_count: int = 0
+
+    def write_field(self, key: str, value: Any) -> None:
+        self._start_field(key)
+        self.file_out.write(_dumps(value, 1))
+
+    def start_list(self, key: str) -> None:
+        self._start_field(key)
+        self.file_out.write("[")
+        self.is_in_list = True
+        self._items_count = 0
+
+    def write_item(self, value: Any) -> None:
+        separator: str = "," if self._items_count else ""
+        self.file_out.write(separator + "\n" + " " * INDENT * 2 + _dumps(value, 2))
+        self._items_count += 1
+
+    def end_list(self) -> None:
+        self.file_out.write("\n" + " " * INDENT + "]" if self._items_count else "]")
+        self.is_in_list = False
+
+    def finish(self) -> None:
+        self.file_out.write("\n}" if self._fields_count else "{}")
+
+    def _start_field(self, key: str) -> None:
+        self.file_out.write("," if self._fields_count else "{")
+        self.file_out.write("\n" + " " * INDENT + json.dumps(key) + ": ")
+        self._fields_count += 1
+
+
+class _NDJSONWriter:
+    """Writes a reference file as newline-delimited JSON, with the same interface as
+    `_JSONWriter`: a header line with the fields other than the classes, then one
+    line per class.
+
+    Arguments:
+
+    - default_fields: fields to add to the header if it doesn't have them yet.
+
+    """
+
+    def __init__(self, file_out: TextIO, default_fields: Dict[str, Any]):
+        self.file_out: TextIO = file_out
+        self.is_in_list: bool = False
+        self.header: Dict[str, Any] = {}
+        self.default_fields: Dict[str, Any] = default_fields
+        self._is_header_written: bool = False
+
+    def write_field(self, key: str, value: Any) -> None:
+        if not self._is_header_written:
+            self.header[key] = value
+        elif key not in self.header or self.header[key] != value:
+            raise ValueError(
+                "The {} field comes after the classes, which newline-delimited JSON"
+                " doesn't support.".format(key)
+            )
+
+    def start_list(self, key: str) -> None:
+        self.is_in_list = True
+
+    def write_item(self, value: Any) -> None:
+        self._write_header()
+        self.file_out.write(json.dumps(value, separators=(",", ":")) + "\n")
+
+    def end_list(self) -> None:
+        self.is_in_list = False
+
+    def finish(self) -> None:
+        self._write_header()
+
+    def _write_header(self) -> None:
+        if self._is_header_written:
+            return
+        for key, value in self.default_fields.items():
+            self.header.setdefault(key, value)
+        self.file_out.write(json.dumps(self.header) + "\n")
+        self._is_header_written = True
+
+
+def _dumps(value: Any, level: int) -> str:
+    """Returns `value` as indented JSON, to insert at the nesting `level`."""
+    return json.dumps(value, indent=INDENT).replace("\n", "\n" + " " * INDENT * level)
+
+
+def main(args: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="merge_json", description=__doc__.split("\n\n")[0].replace("\n", " ")
+    )
+    parser.add_argument("godot_file", help="Reference file dumped by Godot.")
+    parser.add_argument("target_file", help="Edited reference file to merge into.")
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="-",
+        help="Path of the merged file. Writes newline-delimited JSON if the path ends"
+        " with .ndjson. Default: the standard output.",
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        default=False,
+        help="Drop the classes, symbols, and fields that don't exist in the file"
+        " dumped by Godot.",
+    )
+    namespace: argparse.Namespace = parser.parse_args(args)
+
+    if namespace.output == "-":
+        merge_files(
+            namespace.godot_file, namespace.target_file, sys.stdout, namespace.prune
+        )
+        return
+    # Write to a temporary file first, as the output can be one of the inputs.
+    file_descriptor, temporary_path = tempfile.mkstemp(
+        dir=os.path.dirname(namespace.output) or ".", prefix=".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(file_descriptor, "w") as file_out:
+            merge_files(
+                namespace.godot_file,
+                namespace.target_file,
+                file_out,
+                namespace.prune,
+                namespace.output.lower().endswith(".ndjson"),
+            )
+        os.chmod(temporary_path, get_file_mode())
+        os.replace(temporary_path, namespace.output)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,149 @@
+"""Caches the classes built from reference files, to skip parsing the files again.
+
+Every cache entry is a pickle of the project's information and classes, named after a
+hash of the reference file's content and of the program's version. Converting the
+same file again, for example to another output format or with --make-index, loads the
+entry instead of the reference file. Loading an entry updates its modification time,
+and storing one deletes the least recently used entries above the size limit.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+from argparse import Namespace
+from typing import List, Optional, Tuple
+
+from . import reference_file
+from .config import LOGGER
+from .gdscript_objects import GDScriptClasses, ProjectInfo
+from .profiling import Profiler
+from .utils import get_version, paused_gc
+
+# Increment when the classes change in a way that makes cached entries invalid.
+MODEL_CACHE_VERSION: int = 2
+ENTRY_EXTENSION: str = ".pickle"
+# Number of bytes to read at once when hashing reference files.
+HASH_CHUNK_SIZE: int = 1024 * 1024
+
+Model = Tuple[ProjectInfo, GDScriptClasses]
+
+
+class ModelCache:
+    """Stores built classes in the directory `dirpath`, up to `max_bytes` in total."""
+
+    def __init__(self, dirpath: str, max_bytes: int):
+        self.dirpath: str = dirpath
+        self.max_bytes: int = max_bytes
+        self.version: str = "{}-{}".format(get_version(), MODEL_CACHE_VERSION)
+
+    def get_key(self, path: str, hash_sources: bool = False) -> str:
+        """Returns the key of the classes built from the reference file at `path`.
+        `hash_sources` is the argument of the same name of `reference_file.load()`."""
+        sha256 = hashlib.sha256()
+        sha256.update("{}:{}:".format(self.version, hash_sources).encode("utf-8"))
+        with open(path, "rb") as file_in:
+            for chunk in iter(lambda: file_in.read(HASH_CHUNK_SIZE), b""):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def get(self, key: str) -> Optional[Model]:
+        """Returns the cached project information and classes for `key`, or `None` if
+        there is no valid entry."""
+        path: str = self._get_path(key)
+        try:
+            with open(path, "rb") as file_in, paused_gc():
+                model: Model = pickle.load(file_in)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception as error:
+            LOGGER.warning("Invalid model cache entry {}: {}".format(path, error))
+            _remove(path)
+            return None
+        LOGGER.debug("Loaded classes from the model cache entry {}".format(path))
+        return model
+
+    def put(self, key: str, model: Model) -> None:
+        """Stores the project information and classes, then deletes the least recently
+        used entries if the cache is over its size limit."""
+        os.makedirs(self.dirpath, exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            dir=self.dirpath, prefix=".", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(file_descriptor, "wb") as file_out, paused_gc():
+                pickle.dump(model, file_out, pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, self._get_path(key))
+        except BaseException:
+            _remove(temporary_path)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """Deletes the least recently used entries until the cache fits in
+        `max_bytes`. Always keeps the most recent entry."""
+        entries: List[Tuple[float, int, str]] = []
+        for filename in os.listdir(self.dirpath):
+            if not filename.endswith(ENTRY_EXTENSION):
+                continue
+            path: str = os.path.join(self.dirpath, filename)
+            try:
+                stat: os.stat_result = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total: int = sum(size for _, size, _ in entries)
+        for _, size, path in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            LOGGER.debug("Evicting model cache entry {}".format(path))
+            _remove(path)
+            total -= size
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.dirpath, key + ENTRY_EXTENSION)
+
+
+def from_arguments(arguments: Namespace) -> Optional[ModelCache]:
+    """Returns the cache set with the --model-cache options, or `None`."""
+    if not arguments.model_cache:
+        return None
+    return ModelCache(arguments.model_cache, arguments.model_cache_size * 1024 * 1024)
+
+
+def load(
+    path: str,
+    cache: Optional[ModelCache],
+    jobs: int = 1,
+    hash_sources: bool = False,
+    profiler: Optional[Profiler] = None,
+) -> Model:
+    """Like `reference_file.load()`, loading the classes from `cache` if it has them
+    and storing them in it otherwise. Does without the cache if `cache` is `None`, and
+    for shard directories, which have a cache of their own."""
+    if cache is None or os.path.isdir(path):
+        return reference_file.load(path, jobs, hash_sources, profiler)
+
+    profiler = profiler or Profiler()
+    with profiler.stage("model_cache"):
+        key: str = cache.get_key(path, hash_sources)
+        model: Optional[Model] = cache.get(key)
+    if model is not None:
+        return model
+
+    model = reference_file.load(path, jobs, hash_sources, profiler)
+    with profiler.stage("model_cache"):
+        try:
+            cache.put(key, model)
+        except OSError as error:
+            LOGGER.warning("Could not write to the model cache: {}".format(error))
+    return model
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
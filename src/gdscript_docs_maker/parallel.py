@@ -0,0 +1,190 @@
+"""Converts reference files and classes in worker processes.
+
+- `convert_files()` converts several reference files at once, one per worker.
+- `iter_markdown()` converts the classes of a single project in chunks spread over
+  the workers. Each worker receives the project's classes once, when it starts, and
+  then only the indices of the classes to convert.
+
+Results come back in the order of the input, so the output is the same as when
+converting everything in a single process.
+"""
+import logging
+import math
+from argparse import Namespace
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from . import convert_to_markdown, model_cache
+from .config import LOGGER
+from .gdscript_objects import GDScriptClass, GDScriptClasses, ProjectInfo
+from .incremental import BuildCache
+from .make_markdown import MarkdownDocument
+from .search_index import SearchIndex
+
+# Below this number of classes, starting worker processes costs more than converting
+# the classes.
+MIN_PARALLEL_CLASSES: int = 100
+# Number of chunks of classes to create per worker, to balance the load between
+# workers while keeping the number of messages between processes low.
+CHUNKS_PER_JOB: int = 4
+
+# Data of the project a worker process converts classes from, set when the worker
+# starts.
+_worker_classes: Optional[GDScriptClasses] = None
+_worker_arguments: Optional[Namespace] = None
+
+
+@dataclass
+class ConvertedFile:
+    """The result of converting one reference file.
+
+    Attributes:
+
+    - documents: (filename, text) pairs of the generated documents.
+    - kept: filenames of the documents that didn't need to be converted again.
+    - cache: the entries of the build cache for the file, if using one.
+    - search: the search index of the file's classes, with --search-index.
+
+    """
+
+    path: str
+    info: ProjectInfo
+    classes_count: int
+    documents: List[Tuple[str, str]]
+    kept: List[str]
+    cache: Optional[BuildCache]
+    search: Optional[SearchIndex]
+
+
+def convert_files(
+    paths: List[str],
+    arguments: Namespace,
+    jobs: int,
+    build_cache: Optional[BuildCache] = None,
+) -> Iterator[ConvertedFile]:
+    """Converts the reference files at `paths` with up to `jobs` processes and yields
+    the results in the order of `paths`. Merges the cache entries of each file into
+    `build_cache` as results arrive. With --search-index, each result has the search
+    index of its file."""
+    with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as executor:
+        results: Iterator[ConvertedFile] = executor.map(
+            _convert_file,
+            paths,
+            [arguments] * len(paths),
+            [build_cache.split(path) if build_cache else None for path in paths],
+        )
+        for result in results:
+            if build_cache and result.cache:
+                build_cache.merge(result.cache)
+            yield result
+
+
+def _convert_file(
+    path: str, arguments: Namespace, cache: Optional[BuildCache]
+) -> ConvertedFile:
+    # Worker processes can't start processes of their own, so files load serially.
+    info, classes = model_cache.load(
+        path, model_cache.from_arguments(arguments), hash_sources=cache is not None
+    )
+    selection: Optional[List[GDScriptClass]] = None
+    kept: List[str] = []
+    if cache:
+        selection = cache.update(path, classes)
+        converted: Set[str] = {gdscript.name for gdscript in selection}
+        kept = [
+            filename
+            for gdscript in classes
+            if gdscript.name not in converted
+            for filename in convert_to_markdown.get_page_filenames(
+                arguments, gdscript.name
+            )
+        ]
+    search: Optional[SearchIndex] = SearchIndex() if arguments.search_index else None
+    documents: List[Tuple[str, str]] = [
+        (document.get_filename(), document.as_string())
+        for document in iter_markdown(classes, arguments, info, selection, 1, search)
+    ]
+    return ConvertedFile(path, info, len(classes), documents, kept, cache, search)
+
+
+def iter_markdown(
+    classes: GDScriptClasses,
+    arguments: Namespace,
+    info: ProjectInfo,
+    selection: Optional[List[GDScriptClass]] = None,
+    jobs: int = 1,
+    search: Optional[SearchIndex] = None,
+) -> Iterator[MarkdownDocument]:
+    """Like `convert_to_markdown.iter_markdown()`, converting the classes with up to
+    `jobs` worker processes if there are enough classes. Adds every class to the
+    `search` index in the same pass, including the classes not in `selection`."""
+    targets: List[GDScriptClass] = classes if selection is None else selection
+    if arguments.make_index:
+        yield from convert_to_markdown.convert_index_to_documents(
+            classes, info, arguments
+        )
+    if jobs <= 1 or len(targets) < MIN_PARALLEL_CLASSES:
+        selected: Set[int] = {id(gdscript) for gdscript in targets}
+        for gdscript in classes:
+            if search is not None:
+                search.add_class(gdscript)
+            if id(gdscript) in selected:
+                yield from convert_to_markdown.convert_class_to_documents(
+                    classes, gdscript, arguments
+                )
+        return
+
+    if arguments.reverse_references:
+        # Build them once, for the workers to receive with the classes.
+        classes.get_reverse_references()
+    positions: Dict[int, int] = {id(gdscript): i for i, gdscript in enumerate(classes)}
+    indices: List[int] = [positions[id(gdscript)] for gdscript in targets]
+    size: int = math.ceil(len(indices) / (jobs * CHUNKS_PER_JOB))
+    chunks: List[List[int]] = [
+        indices[start : start + size] for start in range(0, len(indices), size)
+    ]
+    LOGGER.debug(
+        "Converting {} classes in {} chunks with {} processes".format(
+            len(indices), len(chunks), jobs
+        )
+    )
+    # Index of the next class to add to the search index, which follows the chunks
+    # as they come back from the workers.
+    searched: int = 0
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_initialize_worker,
+        initargs=(classes, arguments, LOGGER.getEffectiveLevel()),
+    ) as executor:
+        for chunk, documents in zip(chunks, executor.map(_convert_chunk, chunks)):
+            if search is not None:
+                for gdscript in classes[searched : chunk[-1] + 1]:
+                    search.add_class(gdscript)
+                searched = max(searched, chunk[-1] + 1)
+            yield from documents
+    if search is not None:
+        for gdscript in classes[searched:]:
+            search.add_class(gdscript)
+
+
+def _initialize_worker(
+    classes: GDScriptClasses, arguments: Namespace, log_level: int
+) -> None:
+    global _worker_classes, _worker_arguments
+    _worker_classes, _worker_arguments = classes, arguments
+    # Processes started with the spawn method don't inherit the logging setup.
+    if not logging.getLogger().handlers:
+        logging.basicConfig(level=log_level)
+
+
+def _convert_chunk(indices: List[int]) -> List[MarkdownDocument]:
+    assert _worker_classes is not None and _worker_arguments is not None
+    documents: List[MarkdownDocument] = []
+    for index in indices:
+        documents.extend(
+            convert_to_markdown.convert_class_to_documents(
+                _worker_classes, _worker_classes[index], _worker_arguments
+            )
+        )
+    return documents
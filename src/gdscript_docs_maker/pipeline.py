@@ -0,0 +1,200 @@
+"""Runs the stages of a conversion in threads connected by bounded queues.
+
+Each stage takes items from the queue of the previous stage, processes them, and puts
+the results in its own queue, so parsing classes, rendering pages, and writing files
+overlap. The queues only hold a few items: a stage that gets ahead of the next one
+waits for it, which keeps memory use flat.
+
+The stages share the interpreter lock, so the overlap mostly hides the time spent
+waiting for the disk. The throughput of every stage shows which one limits the run.
+"""
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from .config import LOGGER
+
+# Maximum number of items waiting between two stages.
+QUEUE_SIZE: int = 16
+# Seconds a blocked stage waits before checking if another stage failed.
+POLL_INTERVAL: float = 0.1
+
+# Marks the end of the items in a queue.
+_DONE = object()
+
+
+@dataclass
+class StageThroughput:
+    name: str
+    items: int = 0
+    # Time spent processing items, without the time spent waiting for other stages.
+    busy_seconds: float = 0.0
+    # Time from the start of the pipeline to the moment the stage finished.
+    seconds: float = 0.0
+
+    def get_rate(self) -> float:
+        """Returns the number of items the stage processes per second of work."""
+        return self.items / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "items": self.items,
+            "busy_seconds": round(self.busy_seconds, 6),
+            "seconds": round(self.seconds, 6),
+            "items_per_second": round(self.get_rate(), 3),
+        }
+
+
+def run(
+    source: Iterable[Any],
+    stages: List[Tuple[str, Callable[[Any], Any]]],
+    source_name: str = "read",
+    queue_size: int = QUEUE_SIZE,
+) -> List[StageThroughput]:
+    """Passes every item of `source` through the `stages`, a list of (name, function)
+    pairs, in order. Items stay in the order of the source.
+
+    Iterating over `source` is the first stage, named `source_name`. Every stage runs
+    in its own thread, except the last one, which runs in the calling thread. If a
+    stage raises an exception, the pipeline stops and raises it again.
+
+    Returns the throughput of the source and of every stage.
+
+    """
+    assert stages, "The pipeline needs at least one stage"
+    throughputs: List[StageThroughput] = [StageThroughput(source_name)] + [
+        StageThroughput(name) for name, _ in stages
+    ]
+    queues: List["queue.Queue[Any]"] = [queue.Queue(maxsize=queue_size) for _ in stages]
+    stop: threading.Event = threading.Event()
+    errors: List[BaseException] = []
+    start: float = time.perf_counter()
+
+    threads: List[threading.Thread] = [
+        threading.Thread(
+            target=_run_source,
+            args=(iter(source), queues[0], throughputs[0], stop, errors, start),
+            daemon=True,
+        )
+    ]
+    for index, (_, function) in enumerate(stages[:-1]):
+        threads.append(
+            threading.Thread(
+                target=_run_stage,
+                args=(
+                    function,
+                    queues[index],
+                    queues[index + 1],
+                    throughputs[index + 1],
+                    stop,
+                    errors,
+                    start,
+                ),
+                daemon=True,
+            )
+        )
+    for thread in threads:
+        thread.start()
+    try:
+        _run_stage(
+            stages[-1][1], queues[-1], None, throughputs[-1], stop, errors, start
+        )
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+    return throughputs
+
+
+def log_throughputs(throughputs: List[StageThroughput]) -> None:
+    """Logs the throughput of every stage and the stage that limited the run."""
+    for stats in throughputs:
+        LOGGER.info(
+            "  {}: {} items in {:.3f}s of work, {:.1f} items/s".format(
+                stats.name, stats.items, stats.busy_seconds, stats.get_rate()
+            )
+        )
+    slowest: StageThroughput = max(throughputs, key=lambda stats: stats.busy_seconds)
+    LOGGER.info("Slowest stage: {}".format(slowest.name))
+
+
+def _run_source(
+    iterator: Iterator[Any],
+    queue_out: "queue.Queue[Any]",
+    stats: StageThroughput,
+    stop: threading.Event,
+    errors: List[BaseException],
+    start: float,
+) -> None:
+    try:
+        while not stop.is_set():
+            time_start: float = time.perf_counter()
+            item: Any = next(iterator, _DONE)
+            stats.busy_seconds += time.perf_counter() - time_start
+            if item is _DONE:
+                break
+            stats.items += 1
+            if not _put(queue_out, item, stop):
+                return
+        _put(queue_out, _DONE, stop)
+    except BaseException as error:
+        errors.append(error)
+        stop.set()
+    finally:
+        stats.seconds = time.perf_counter() - start
+
+
+def _run_stage(
+    function: Callable[[Any], Any],
+    queue_in: "queue.Queue[Any]",
+    queue_out: Optional["queue.Queue[Any]"],
+    stats: StageThroughput,
+    stop: threading.Event,
+    errors: List[BaseException],
+    start: float,
+) -> None:
+    try:
+        while True:
+            item: Any = _get(queue_in, stop)
+            if item is _DONE:
+                break
+            time_start: float = time.perf_counter()
+            result: Any = function(item)
+            stats.busy_seconds += time.perf_counter() - time_start
+            stats.items += 1
+            if queue_out is not None and not _put(queue_out, result, stop):
+                return
+        if queue_out is not None:
+            _put(queue_out, _DONE, stop)
+    except BaseException as error:
+        errors.append(error)
+        stop.set()
+    finally:
+        stats.seconds = time.perf_counter() - start
+
+
+def _put(queue_out: "queue.Queue[Any]", item: Any, stop: threading.Event) -> bool:
+    """Puts `item` in the queue, waiting for room. Returns `False` if the pipeline
+    stopped in the meantime."""
+    while not stop.is_set():
+        try:
+            queue_out.put(item, timeout=POLL_INTERVAL)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _get(queue_in: "queue.Queue[Any]", stop: threading.Event) -> Any:
+    """Returns the next item of the queue, or `_DONE` if the pipeline stopped."""
+    while True:
+        try:
+            return queue_in.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            if stop.is_set():
+                return _DONE
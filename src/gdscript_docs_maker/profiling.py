@@ -0,0 +1,181 @@
+"""Measures where a run spends its time and memory, for the --profile option.
+
+The profiler times named stages of the run, like decoding JSON or saving files, and
+records the peak memory allocated during each stage with tracemalloc. It also times
+the conversion of every class to find the slowest pages, and can record the whole
+run with cProfile. Tracing allocations slows the program down, so compare stage
+times between profiled runs only.
+"""
+import cProfile
+import heapq
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .config import LOGGER
+from .make_markdown import MarkdownDocument
+
+# Number of classes to list in the report, from the slowest to convert.
+SLOWEST_CLASSES_COUNT: int = 20
+
+
+@dataclass
+class StageStats:
+    seconds: float = 0.0
+    calls: int = 0
+    # Largest increase in traced memory during one call of the stage, or None if it
+    # wasn't measured.
+    peak_bytes: Optional[int] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "seconds": round(self.seconds, 6),
+            "calls": self.calls,
+            "peak_bytes": self.peak_bytes,
+        }
+
+
+class Profiler:
+    """Collects the time and memory use of the stages of a run. Does nothing unless
+    `enabled` is `True`.
+
+    Arguments:
+
+    - cprofile_path: if set, records the run with cProfile and saves the statistics
+      to this path, to open with pstats or a viewer like snakeviz.
+
+    """
+
+    def __init__(self, enabled: bool = False, cprofile_path: str = ""):
+        self.enabled: bool = enabled
+        self.cprofile_path: str = cprofile_path
+        self.stages: Dict[str, StageStats] = {}
+        self.class_times: List[Tuple[float, str]] = []
+        self.peak_bytes: int = 0
+        self.seconds: float = 0.0
+        # Python 3.9 added reset_peak(), which per-stage peaks depend on.
+        self.tracks_stage_peaks: bool = hasattr(tracemalloc, "reset_peak")
+        # Peak traced memory of each open stage, from the outermost one.
+        self._peaks: List[int] = []
+        self._profile: Optional[cProfile.Profile] = None
+        self._start_time: float = 0.0
+
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        tracemalloc.start()
+        if self.cprofile_path:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._start_time = time.perf_counter()
+
+    def stop(self) -> None:
+        if not self.enabled:
+            return
+        self.seconds = time.perf_counter() - self._start_time
+        if self._profile:
+            self._profile.disable()
+            self._profile.dump_stats(self.cprofile_path)
+        self.peak_bytes = max(self.peak_bytes, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Adds the time and peak memory use of the code in the context to the stage
+        `name`. Stages can be nested."""
+        if not self.enabled:
+            yield
+            return
+
+        current, peak = tracemalloc.get_traced_memory()
+        if self.tracks_stage_peaks:
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            tracemalloc.reset_peak()
+            self._peaks.append(current)
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds: float = time.perf_counter() - start
+            stats: StageStats = self.stages.setdefault(name, StageStats())
+            stats.seconds += seconds
+            stats.calls += 1
+            if self.tracks_stage_peaks:
+                peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                self.peak_bytes = max(self.peak_bytes, peak)
+                stats.peak_bytes = max(stats.peak_bytes or 0, peak - current)
+
+    def timed(self, function: Callable, name: str) -> Callable:
+        """Returns `function` wrapped to add its run time to the stage `name`, without
+        measuring memory. Use it for functions called many times."""
+        if not self.enabled:
+            return function
+
+        stats: StageStats = self.stages.setdefault(name, StageStats())
+
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start: float = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats.seconds += time.perf_counter() - start
+                stats.calls += 1
+
+        return wrapper
+
+    def iter_documents(
+        self, documents: Iterable[MarkdownDocument], name: str = "convert"
+    ) -> Iterator[MarkdownDocument]:
+        """Yields the documents, measuring the time to produce each of them as the
+        stage `name` and as the conversion time of its class. `documents` should be
+        lazy, like a generator, for the times to be meaningful."""
+        if not self.enabled:
+            yield from documents
+            return
+
+        iterator: Iterator[MarkdownDocument] = iter(documents)
+        while True:
+            start: float = time.perf_counter()
+            with self.stage(name):
+                document: Optional[MarkdownDocument] = next(iterator, None)
+            if document is None:
+                # The last call only finds that there are no documents left.
+                self.stages[name].calls -= 1
+                return
+            self.class_times.append((time.perf_counter() - start, document.title))
+            yield document
+
+    def get_report(self) -> dict:
+        slowest: List[Tuple[float, str]] = heapq.nlargest(
+            SLOWEST_CLASSES_COUNT, self.class_times
+        )
+        return {
+            "seconds": round(self.seconds, 6),
+            "peak_bytes": self.peak_bytes,
+            "stages": {name: stats.as_dict() for name, stats in self.stages.items()},
+            "slowest_classes": [
+                {"name": name, "seconds": round(seconds, 6)}
+                for seconds, name in slowest
+            ],
+            "cprofile": self.cprofile_path or None,
+        }
+
+    def save(self, path: str) -> None:
+        """Saves the report to `path` as JSON and logs a summary."""
+        with open(path, "w") as file_out:
+            json.dump(self.get_report(), file_out, indent=2)
+
+        LOGGER.info("Profile saved to {}".format(path))
+        for name, stats in self.stages.items():
+            memory: str = ""
+            if stats.peak_bytes is not None:
+                memory = ", peak {:.1f} MB".format(stats.peak_bytes / 1024 ** 2)
+            LOGGER.info(
+                "  {}: {:.3f}s in {} calls{}".format(
+                    name, stats.seconds, stats.calls, memory
+                )
+            )
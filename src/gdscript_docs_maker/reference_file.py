@@ -0,0 +1,397 @@
+"""Loads reference files dumped by the Godot collector scripts.
+
+Supports three formats:
+
+- The JSON document produced by `Collector.print_pretty_json`, with the project's
+  information and a `classes` list.
+- Newline-delimited JSON produced by `Collector.print_ndjson`: a header line with the
+  project's name, description, and version, followed by one compact class
+  dictionary per line. Large files in this format are split into byte ranges that
+  worker processes parse in parallel.
+- A shard directory produced by `Collector.save_shards`: a `project.json` file with
+  the project's information, and one JSON file per script with its class dictionary,
+  in subdirectories that mirror the project. Loading the directory parses the shards
+  that changed since the previous run and takes the other classes from a
+  `ShardCache`.
+"""
+import hashlib
+import json
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterator, List, Optional, TextIO, Tuple, Union
+
+from .config import LOGGER
+from .gdscript_objects import GDScriptClass, GDScriptClasses, ProjectInfo
+from .profiling import Profiler
+from .shard_cache import ShardCache
+from .utils import paused_gc
+
+REFERENCE_FILE_EXTENSIONS = (".json", ".ndjson")
+# File with the project's information in a shard directory.
+SHARDS_PROJECT_FILENAME: str = "project.json"
+SHARD_EXTENSION: str = ".json"
+# Below this size, starting worker processes costs more than parsing the file.
+MIN_PARALLEL_SIZE: int = 4 * 1024 * 1024
+# Number of byte ranges to create per worker, to balance the load between workers.
+RANGES_PER_JOB: int = 4
+# Number of characters to read at once when streaming a JSON reference file.
+STREAM_CHUNK_SIZE: int = 1024 * 1024
+
+
+def is_reference_file(path: str) -> bool:
+    return path.lower().endswith(REFERENCE_FILE_EXTENSIONS) or is_shard_directory(path)
+
+
+def is_shard_directory(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, SHARDS_PROJECT_FILENAME))
+
+
+def get_shard_paths(dirpath: str) -> List[str]:
+    """Returns the paths of the shards in the directory `dirpath` and its
+    subdirectories, sorted so the classes come in the same order on every run."""
+    project_path: str = os.path.join(dirpath, SHARDS_PROJECT_FILENAME)
+    paths: List[str] = []
+    for root, dirnames, filenames in os.walk(dirpath):
+        dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+        paths.extend(
+            os.path.join(root, filename)
+            for filename in filenames
+            if filename.endswith(SHARD_EXTENSION) and not filename.startswith(".")
+        )
+    return sorted(path for path in paths if path != project_path)
+
+
+def load(
+    path: str,
+    jobs: int = 1,
+    hash_sources: bool = False,
+    profiler: Optional[Profiler] = None,
+) -> Tuple[ProjectInfo, GDScriptClasses]:
+    """Loads the reference file at `path` and returns the project's information and
+    its classes.
+
+    Arguments:
+
+    - jobs: maximum number of worker processes to parse newline-delimited JSON files
+      with.
+    - hash_sources: if `True`, sets the `source_hash` of every class to the
+      `hash_class_data()` of its dictionary. Classes from shard directories always
+      have it, as they're cached.
+    - profiler: measures decoding and building the classes as the "decode" and
+      "build" stages for JSON files. For newline-delimited JSON files, where both
+      happen line by line, measures them together as the "load" stage.
+
+    """
+    profiler = profiler or Profiler()
+    if os.path.isdir(path):
+        with profiler.stage("load"):
+            return _load_shards(path)
+
+    with open(path, "rb") as file_in:
+        header: Optional[dict] = _parse_header(file_in.readline())
+        header_size: int = file_in.tell()
+
+    if header is None:
+        with profiler.stage("decode"):
+            with open(path, "r") as json_file:
+                text: str = json_file.read()
+            with paused_gc():
+                data: dict = json.loads(text)
+        with profiler.stage("build"), paused_gc():
+            return (
+                ProjectInfo.from_dict(data),
+                GDScriptClasses(
+                    [
+                        _build_class(entry, hash_sources)
+                        for entry in data["classes"]
+                        if "name" in entry
+                    ]
+                ),
+            )
+
+    classes: List[GDScriptClass] = []
+    with profiler.stage("load"):
+        for chunk in _map_ranges(path, header_size, jobs, hash_sources):
+            classes.extend(chunk)
+        return ProjectInfo.from_dict(header), GDScriptClasses(classes)
+
+
+def hash_class_data(data: dict) -> str:
+    """Returns a hash of the content of a class's source dictionary."""
+    text: str = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def read_sources(path: str) -> Tuple[dict, List[Union[bytes, dict]]]:
+    """Reads the reference file at `path` without building its classes.
+
+    Returns the project's information as a dictionary, and the source of every class:
+    its line for newline-delimited JSON files or its shard for shard directories, left
+    undecoded as it's faster to compare with a previous version of the file, or its
+    dictionary for JSON files.
+
+    """
+    sources: List[Union[bytes, dict]] = []
+    if os.path.isdir(path):
+        for shard_path in get_shard_paths(path):
+            with open(shard_path, "rb") as file_in:
+                sources.append(file_in.read())
+        return _read_project(path), sources
+
+    with open(path, "rb") as file_in:
+        header: Optional[dict] = _parse_header(file_in.readline())
+        if header is not None:
+            for line in file_in:
+                line = line.strip()
+                if line:
+                    sources.append(line)
+            return header, sources
+
+    with open(path, "r") as json_file:
+        text: str = json_file.read()
+    with paused_gc():
+        data: dict = json.loads(text)
+    sources.extend(data.pop("classes"))
+    return data, sources
+
+
+def iter_reference(path: str) -> Iterator[Tuple[str, Any]]:
+    """Reads the reference file at `path` incrementally, without holding more than one
+    class in memory.
+
+    Yields a (key, value) pair for each field of the project's information, and a
+    ("classes", class_data) pair for each class, in the order they appear in the
+    file.
+
+    """
+    if os.path.isdir(path):
+        yield from _read_project(path).items()
+        for shard_path in get_shard_paths(path):
+            with open(shard_path, "rb") as file_in:
+                yield "classes", json.loads(file_in.read())
+        return
+
+    with open(path, "rb") as file_in:
+        header: Optional[dict] = _parse_header(file_in.readline())
+        if header is not None:
+            yield from header.items()
+            for line in file_in:
+                if line.strip():
+                    yield "classes", json.loads(line)
+            return
+
+    with open(path, "r") as json_file:
+        yield from _JSONStreamReader(json_file).iter_fields()
+
+
+def _parse_header(line: bytes) -> Optional[dict]:
+    """Returns the header of a newline-delimited JSON reference file, or `None` if
+    `line` is not the header of such a file."""
+    try:
+        header = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(header, dict) or "classes" in header:
+        return None
+    return header
+
+
+def _load_shards(dirpath: str) -> Tuple[ProjectInfo, GDScriptClasses]:
+    cache: ShardCache = ShardCache(dirpath)
+    classes: List[GDScriptClass] = []
+    with paused_gc():
+        for path in get_shard_paths(dirpath):
+            classes.extend(cache.load(path, _parse_shard))
+    cache.save()
+    LOGGER.info(
+        "Parsed {} of {} shards, loaded the others from the cache".format(
+            cache.parsed_count, len(cache.entries)
+        )
+    )
+    return ProjectInfo.from_dict(_read_project(dirpath)), GDScriptClasses(classes)
+
+
+def _parse_shard(content: bytes) -> List[GDScriptClass]:
+    entry: dict = json.loads(content)
+    return [_build_class(entry, True)] if "name" in entry else []
+
+
+def _read_project(dirpath: str) -> dict:
+    with open(os.path.join(dirpath, SHARDS_PROJECT_FILENAME), "r") as file_in:
+        return json.load(file_in)
+
+
+def _build_class(data: dict, hash_source: bool) -> GDScriptClass:
+    source_hash: str = hash_class_data(data) if hash_source else ""
+    gdscript: GDScriptClass = GDScriptClass.from_dict(data)
+    gdscript.source_hash = source_hash
+    return gdscript
+
+
+def _map_ranges(
+    path: str, start: int, jobs: int, hash_sources: bool
+) -> List[List[GDScriptClass]]:
+    """Splits the file into byte ranges starting at `start` and parses each of them,
+    in parallel if the file is large enough."""
+    size: int = os.path.getsize(path)
+    if jobs <= 1 or size - start < MIN_PARALLEL_SIZE:
+        return [_parse_range(path, start, size, hash_sources)]
+
+    ranges: List[Tuple[int, int]] = _split_ranges(
+        path, start, size, jobs * RANGES_PER_JOB
+    )
+    LOGGER.debug(
+        "Parsing {} in {} ranges with {} processes".format(path, len(ranges), jobs)
+    )
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(
+            executor.map(
+                _parse_range,
+                [path] * len(ranges),
+                [r[0] for r in ranges],
+                [r[1] for r in ranges],
+                [hash_sources] * len(ranges),
+            )
+        )
+
+
+def _split_ranges(
+    path: str, start: int, size: int, count: int
+) -> List[Tuple[int, int]]:
+    """Returns up to `count` (start, end) byte ranges covering the file from `start`
+    to `size`, with every range ending after a newline character."""
+    ranges: List[Tuple[int, int]] = []
+    step: int = max(1, (size - start) // count)
+    with open(path, "rb") as file_in, mmap.mmap(
+        file_in.fileno(), 0, access=mmap.ACCESS_READ
+    ) as buffer:
+        while start < size:
+            newline: int = buffer.find(b"\n", min(start + step, size) - 1)
+            end: int = size if newline == -1 else newline + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _parse_range(
+    path: str, start: int, end: int, hash_sources: bool
+) -> List[GDScriptClass]:
+    """Parses one class dictionary per line between the `start` and `end` byte
+    offsets of the file."""
+    classes: List[GDScriptClass] = []
+    if start >= end:
+        return classes
+
+    with open(path, "rb") as file_in, mmap.mmap(
+        file_in.fileno(), 0, access=mmap.ACCESS_READ
+    ) as buffer, paused_gc():
+        position: int = start
+        while position < end:
+            newline: int = buffer.find(b"\n", position, end)
+            line_end: int = end if newline == -1 else newline
+            line: bytes = buffer[position:line_end]
+            position = line_end + 1
+            if not line.strip():
+                continue
+            entry: dict = json.loads(line)
+            if "name" in entry:
+                classes.append(_build_class(entry, hash_sources))
+    return classes
+
+
+class _JSONStreamReader:
+    """Decodes a JSON reference document one top-level value at a time, and the
+    `classes` list one class at a time, reading the file in chunks."""
+
+    def __init__(self, file_in: TextIO, chunk_size: int = STREAM_CHUNK_SIZE):
+        self.file_in: TextIO = file_in
+        self.chunk_size: int = chunk_size
+        self.decoder: json.JSONDecoder = json.JSONDecoder()
+        self.buffer: str = ""
+        self.position: int = 0
+        self.is_eof: bool = False
+
+    def iter_fields(self) -> Iterator[Tuple[str, Any]]:
+        self._expect("{")
+        while self._peek() != "}":
+            key: str = self._decode()
+            self._expect(":")
+            if key == "classes":
+                yield from ((key, entry) for entry in self._iter_list())
+            else:
+                yield key, self._decode()
+            if self._peek() == ",":
+                self._expect(",")
+        self._expect("}")
+
+    def _iter_list(self) -> Iterator[Any]:
+        self._expect("[")
+        while self._peek() != "]":
+            yield self._decode()
+            if self._peek() == ",":
+                self._expect(",")
+        self._expect("]")
+
+    def _read(self, size: int) -> bool:
+        """Appends up to `size` characters from the file to the buffer, dropping the
+        characters already decoded. Returns `False` at the end of the file."""
+        chunk: str = self.file_in.read(size)
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        self.is_eof = not chunk
+        return not self.is_eof
+
+    def _peek(self) -> str:
+        """Skips whitespace and returns the next character without consuming it."""
+        while True:
+            while (
+                self.position < len(self.buffer)
+                and self.buffer[self.position].isspace()
+            ):
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._read(self.chunk_size):
+                raise ValueError("Unexpected end of file in " + self.file_in.name)
+
+    def _expect(self, character: str) -> None:
+        if self._peek() != character:
+            raise ValueError(
+                "Expected '{}' at character {} in {}, found '{}'".format(
+                    character, self.position, self.file_in.name, self._peek()
+                )
+            )
+        self.position += 1
+
+    def _decode(self) -> Any:
+        """Decodes the next JSON value, reading more of the file until the buffer holds
+        all of it. Each retry reads twice as much, to keep decoding linear."""
+        self._peek()
+        size: int = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self._read(size):
+                    raise
+                size *= 2
+                continue
+            # A number or literal may continue in the next chunk, like `1.` before
+            # `5`, so it's only complete before a delimiter or at the end of the file.
+            if isinstance(value, (dict, list, str)) or self._is_value_end(end):
+                self.position = end
+                return value
+            if not self._read(size):
+                self.position = end
+                return value
+            size *= 2
+
+    def _is_value_end(self, end: int) -> bool:
+        """Returns `True` if a value ending at `end` is followed by a delimiter, or by
+        the end of the file."""
+        while end < len(self.buffer) and self.buffer[end].isspace():
+            end += 1
+        if end < len(self.buffer):
+            return self.buffer[end] in ",}]"
+        return self.is_eof
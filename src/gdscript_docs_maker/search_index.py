@@ -0,0 +1,206 @@
+"""Builds a search index of the classes and their symbols, for the --search-index
+option, so websites can search the reference without crawling the pages.
+
+The index is a set of JSON files in the output directory, meant to load lazily in the
+browser:
+
+- `search_index.json`, the manifest: the format version, the names of the symbol
+  kinds, the number of symbols per chunk, and the list of shards.
+- `search_index_<key>.json`, one shard per first character of the terms, a to z or 0
+  for digits: the sorted list of terms starting with the key, and for each term its
+  posting list, the sorted ids of the symbols it matches. Posting lists store the
+  difference to the previous id, starting from 0. As the terms are sorted, a binary
+  search finds all the terms starting with a prefix.
+- `search_symbols_<n>.json`, the symbol table, in chunks of `SYMBOLS_PER_CHUNK`
+  symbols: symbol `id` is in chunk `id // SYMBOLS_PER_CHUNK`. Each symbol is a list
+  with its name, the index of its kind, its class, the page it's on, the anchor of
+  its heading on the page, and its signature or type.
+
+Terms come from the names of symbols, in full and split at underscores and case
+changes, their signatures and types, and the words of their descriptions.
+"""
+import json
+import re
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .gdscript_objects import Element, GDScriptClass
+
+SEARCH_INDEX_VERSION: int = 1
+MANIFEST_FILENAME: str = "search_index.json"
+SHARD_FILENAME: str = "search_index_{}.json"
+SYMBOLS_FILENAME: str = "search_symbols_{}.json"
+SYMBOLS_PER_CHUNK: int = 1000
+KINDS: Tuple[str, ...] = (
+    "class",
+    "function",
+    "member",
+    "constant",
+    "signal",
+    "enum",
+)
+# Attributes of GDScriptClass holding the symbols of each kind after "class".
+KIND_ATTRIBUTES: Tuple[str, ...] = (
+    "functions",
+    "members",
+    "constants",
+    "signals",
+    "enums",
+)
+# Words of descriptions that match too many symbols to help find any.
+STOP_WORDS: Set[str] = {
+    "an",
+    "and",
+    "are",
+    "as",
+    "at",
+    "be",
+    "by",
+    "for",
+    "if",
+    "in",
+    "is",
+    "it",
+    "of",
+    "on",
+    "or",
+    "the",
+    "this",
+    "to",
+    "with",
+}
+
+# Matches words of at least two characters, including snake_case words.
+PATTERN_WORD = re.compile(r"[a-z0-9][a-z0-9_]*[a-z0-9]")
+PATTERN_NAME_PART = re.compile(r"[A-Z]*[a-z0-9]+|[A-Z]+(?![a-z])")
+
+# A symbol of the index: name, kind, class, page, anchor, and signature or type.
+Symbol = Tuple[str, int, str, str, str, str]
+
+
+class SearchIndex:
+    """Collects the symbols of classes and the terms that find them. Call
+    `add_class()` for every class in the order of the pages, then `iter_files()` to
+    get the index files."""
+
+    def __init__(self) -> None:
+        self.symbols: List[Symbol] = []
+        # Maps terms to the ids of the symbols they find, in increasing order.
+        self.postings: Dict[str, List[int]] = {}
+        # Terms of symbol names, which repeat across classes.
+        self._name_terms: Dict[str, Set[str]] = {}
+
+    def add_class(self, gdscript: GDScriptClass, page: str = "") -> None:
+        """Adds the class `gdscript` and its symbols to the index. `page` is the name
+        of the page of the top-level class, for sub-classes."""
+        page = page or gdscript.name
+        anchor: str = "" if page == gdscript.name else _get_anchor(gdscript.name)
+        self._add(
+            (gdscript.name, 0, gdscript.name, page, anchor, gdscript.extends),
+            gdscript.description,
+        )
+        for kind, attribute in enumerate(KIND_ATTRIBUTES, 1):
+            for element in getattr(gdscript, attribute):
+                summary: str = _get_summary(element)
+                self._add(
+                    (
+                        element.name,
+                        kind,
+                        gdscript.name,
+                        page,
+                        _get_anchor(element.name),
+                        summary,
+                    ),
+                    element.description,
+                    summary,
+                )
+        for sub_class in gdscript.sub_classes:
+            self.add_class(sub_class, page)
+
+    def merge(self, other: "SearchIndex") -> None:
+        """Appends the symbols of `other` to this index, after its own symbols."""
+        offset: int = len(self.symbols)
+        self.symbols.extend(other.symbols)
+        for term, ids in other.postings.items():
+            self.postings.setdefault(term, []).extend(i + offset for i in ids)
+
+    def iter_files(self) -> Iterator[Tuple[str, str]]:
+        """Yields the filename and the JSON text of every file of the index."""
+        shards: Dict[str, List[str]] = {}
+        for term in sorted(self.postings):
+            shards.setdefault(_get_shard_key(term), []).append(term)
+        for key, terms in shards.items():
+            yield SHARD_FILENAME.format(key), _dumps(
+                {
+                    "terms": terms,
+                    "postings": [_encode(self.postings[term]) for term in terms],
+                }
+            )
+
+        chunks_count: int = 0
+        for start in range(0, len(self.symbols), SYMBOLS_PER_CHUNK):
+            yield SYMBOLS_FILENAME.format(chunks_count), _dumps(
+                self.symbols[start : start + SYMBOLS_PER_CHUNK]
+            )
+            chunks_count += 1
+
+        yield MANIFEST_FILENAME, _dumps(
+            {
+                "version": SEARCH_INDEX_VERSION,
+                "kinds": KINDS,
+                "symbols_count": len(self.symbols),
+                "symbols_per_chunk": SYMBOLS_PER_CHUNK,
+                "symbols": [SYMBOLS_FILENAME.format(i) for i in range(chunks_count)],
+                "shards": {key: SHARD_FILENAME.format(key) for key in shards},
+            }
+        )
+
+    def _add(self, symbol: Symbol, *texts: str) -> None:
+        symbol_id: int = len(self.symbols)
+        self.symbols.append(symbol)
+        name_terms: Optional[Set[str]] = self._name_terms.get(symbol[0])
+        if name_terms is None:
+            name_terms = set(_iter_name_terms(symbol[0]))
+            self._name_terms[symbol[0]] = name_terms
+        terms: Set[str] = set(PATTERN_WORD.findall(" ".join(texts).lower()))
+        terms -= STOP_WORDS
+        terms |= name_terms
+        postings: Dict[str, List[int]] = self.postings
+        for term in terms:
+            ids: Optional[List[int]] = postings.get(term)
+            if ids is None:
+                postings[term] = [symbol_id]
+            else:
+                ids.append(symbol_id)
+
+
+def _iter_name_terms(name: str) -> Iterator[str]:
+    """Yields the name in lowercase, and the parts of snake_case and CamelCase names,
+    so `move_and_slide` matches `slide` and `KinematicBody` matches `body`."""
+    yield name.lower()
+    for part in name.split("_"):
+        for word in PATTERN_NAME_PART.findall(part):
+            yield word.lower()
+
+
+def _get_summary(element: Element) -> str:
+    """Returns the type of members and constants, and the signature of other
+    symbols."""
+    return getattr(element, "type", "") or element.signature
+
+
+def _get_anchor(name: str) -> str:
+    """Returns the anchor of the heading of the symbol `name` on its page."""
+    return name.lower().replace("_", "-")
+
+
+def _get_shard_key(term: str) -> str:
+    return term[0] if "a" <= term[0] <= "z" else "0"
+
+
+def _encode(ids: List[int]) -> List[int]:
+    """Returns the sorted `ids` as differences to the previous id."""
+    return [ids[0]] + [ids[i] - ids[i - 1] for i in range(1, len(ids))]
+
+
+def _dumps(data: object) -> str:
+    return json.dumps(data, separators=(",", ":"))
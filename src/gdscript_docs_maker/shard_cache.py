@@ -0,0 +1,105 @@
+"""Caches the classes parsed from each shard of a shard directory, so loading the
+directory again only parses the shards that changed.
+
+The cache is a pickle file in the shard directory. For every shard, it stores the
+shard's modification time, size, and content hash, along with its classes, pickled
+on their own so saving the cache only pickles the classes of the shards that changed.
+A shard with the same modification time and size loads from the cache without being
+read. A shard with a new modification time but the same content, for example written
+again by the collector, loads from the cache after hashing it.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .config import LOGGER
+from .gdscript_objects import GDScriptClass
+from .utils import get_version
+
+CACHE_FILENAME: str = ".gdscript_docs_maker_shards.pickle"
+# Increment when the classes change in a way that makes cached entries invalid.
+SHARD_CACHE_VERSION: int = 1
+
+# Modification time, size, content hash, and pickled classes of a shard.
+ShardEntry = Tuple[int, int, str, bytes]
+
+
+class ShardCache:
+    """Loads the classes of the shards in the directory `dirpath`, through the cache.
+    Call `save()` once all shards are loaded: the cache then drops the entries of the
+    shards that were not loaded, as they no longer exist."""
+
+    def __init__(self, dirpath: str):
+        self.dirpath: str = dirpath
+        self.path: str = os.path.join(dirpath, CACHE_FILENAME)
+        self.version: str = "{}-{}".format(get_version(), SHARD_CACHE_VERSION)
+        # Entries by path of the shard, relative to the directory.
+        self.entries: Dict[str, ShardEntry] = {}
+        self.previous_entries: Dict[str, ShardEntry] = self._read()
+        self.parsed_count: int = 0
+        self.is_changed: bool = False
+
+    def load(
+        self, path: str, parse: Callable[[bytes], List[GDScriptClass]]
+    ) -> List[GDScriptClass]:
+        """Returns the classes of the shard at `path`, from the cache if the shard
+        didn't change, or calling `parse` on its content otherwise."""
+        key: str = os.path.relpath(path, self.dirpath)
+        stat: os.stat_result = os.stat(path)
+        entry: Optional[ShardEntry] = self.previous_entries.get(key)
+        if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+            self.entries[key] = entry
+            return pickle.loads(entry[3])
+
+        self.is_changed = True
+        with open(path, "rb") as file_in:
+            content: bytes = file_in.read()
+        digest: str = hashlib.sha1(content).hexdigest()
+        if entry is not None and entry[2] == digest:
+            self.entries[key] = (stat.st_mtime_ns, stat.st_size, digest, entry[3])
+            return pickle.loads(entry[3])
+
+        LOGGER.debug("Parsing shard {}".format(path))
+        classes: List[GDScriptClass] = parse(content)
+        self.parsed_count += 1
+        self.entries[key] = (
+            stat.st_mtime_ns,
+            stat.st_size,
+            digest,
+            pickle.dumps(classes, pickle.HIGHEST_PROTOCOL),
+        )
+        return classes
+
+    def save(self) -> None:
+        """Writes the cache if any shard changed, was added, or was removed."""
+        if not self.is_changed and self.entries.keys() == self.previous_entries.keys():
+            return
+        data: dict = {"version": self.version, "entries": self.entries}
+        try:
+            file_descriptor, temporary_path = tempfile.mkstemp(
+                dir=self.dirpath, prefix=".", suffix=".tmp"
+            )
+            try:
+                with os.fdopen(file_descriptor, "wb") as file_out:
+                    pickle.dump(data, file_out, pickle.HIGHEST_PROTOCOL)
+                os.replace(temporary_path, self.path)
+            except BaseException:
+                os.remove(temporary_path)
+                raise
+        except OSError as error:
+            LOGGER.warning("Could not write the shard cache: {}".format(error))
+
+    def _read(self) -> Dict[str, ShardEntry]:
+        try:
+            with open(self.path, "rb") as file_in:
+                data: dict = pickle.load(file_in)
+        except FileNotFoundError:
+            return {}
+        except Exception as error:
+            LOGGER.warning("Invalid shard cache {}: {}".format(self.path, error))
+            return {}
+        if not isinstance(data, dict) or data.get("version") != self.version:
+            return {}
+        return data["entries"]
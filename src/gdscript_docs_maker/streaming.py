@@ -0,0 +1,79 @@
+"""Converts reference files to markdown in two passes over the file, holding a single
+class in memory at a time.
+
+The first pass builds a GDScriptClasses list of GDScriptClassSummary objects: the
+class index that cross-references and inheritance trees need. The second pass parses,
+renders, and yields the documents one class at a time. Peak memory use depends on the
+largest class rather than on the size of the project.
+"""
+from argparse import Namespace
+from typing import Iterator, List, Optional, Tuple
+
+from .convert_to_markdown import convert_class_to_documents, convert_index_to_documents
+from .gdscript_objects import (
+    GDScriptClass,
+    GDScriptClasses,
+    GDScriptClassSummary,
+    ProjectInfo,
+    ReverseReferences,
+)
+from .make_markdown import MarkdownDocument
+from .reference_file import iter_reference
+from .search_index import SearchIndex
+
+
+def index_classes(
+    path: str, reverse_references: bool = False
+) -> Tuple[ProjectInfo, GDScriptClasses]:
+    """First pass: returns the project's information and the summaries of all the
+    classes in the reference file at `path`. If `reverse_references` is `True`, also
+    sets the classes that inherit from and link to each class, which the summaries
+    don't have the data to find."""
+    project_data: dict = {}
+    summaries: List[GDScriptClassSummary] = []
+    references: Optional[ReverseReferences] = (
+        ReverseReferences() if reverse_references else None
+    )
+    for key, value in iter_reference(path):
+        if key != "classes":
+            project_data[key] = value
+        elif "name" in value:
+            gdscript: GDScriptClass = GDScriptClass.from_dict(value)
+            summaries.append(GDScriptClassSummary.from_class(gdscript))
+            if references is not None:
+                references.add_class(gdscript)
+    classes: GDScriptClasses = GDScriptClasses(summaries)
+    classes.reverse_references = references
+    return ProjectInfo.from_dict(project_data), classes
+
+
+def iter_markdown(
+    path: str,
+    classes: GDScriptClasses,
+    arguments: Namespace,
+    info: ProjectInfo,
+    search: Optional[SearchIndex] = None,
+) -> Iterator[MarkdownDocument]:
+    """Second pass: yields the markdown documents for the reference file at `path`,
+    building and converting one class at a time.
+
+    Arguments:
+
+    - classes: the class index returned by `index_classes()` for the same file.
+    - search: a search index to add the classes to as they're converted.
+
+    """
+    if arguments.make_index:
+        yield from convert_index_to_documents(classes, info, arguments)
+    for gdscript in iter_classes(path):
+        if search is not None:
+            search.add_class(gdscript)
+        yield from convert_class_to_documents(classes, gdscript, arguments)
+
+
+def iter_classes(path: str) -> Iterator[GDScriptClass]:
+    """Second pass: yields the classes of the reference file at `path`, building one
+    class at a time."""
+    for key, value in iter_reference(path):
+        if key == "classes" and "name" in value:
+            yield GDScriptClass.from_dict(value)
@@ -0,0 +1,147 @@
+"""Synchronizes generated documents with the output directory.
+
+Only writes files whose content changed, so unchanged pages keep their modification
+time, and replaces files atomically through a temporary file. A manifest in the
+output directory lists the files generated by the previous run, to delete the ones
+the current run doesn't produce anymore, like pages of deleted classes.
+"""
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import List, Optional, Set
+
+from .config import LOGGER
+
+MANIFEST_FILENAME: str = ".gdscript_docs_maker_manifest.json"
+
+
+@dataclass
+class SyncReport:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+
+    def __str__(self) -> str:
+        return "{} created, {} updated, {} unchanged, {} deleted".format(
+            self.created, self.updated, self.unchanged, self.deleted
+        )
+
+
+class OutputSync:
+    """Writes files to the output directory `dirpath` and tracks the files generated
+    during the run. Call `finish()` once all files are written."""
+
+    def __init__(self, dirpath: str):
+        self.dirpath: str = dirpath
+        self.manifest_path: str = os.path.join(dirpath, MANIFEST_FILENAME)
+        self.report: SyncReport = SyncReport()
+        self.filenames: Set[str] = set()
+        self.previous_filenames: Set[str] = set()
+        if os.path.isfile(self.manifest_path):
+            with open(self.manifest_path, "r") as file_in:
+                self.previous_filenames = set(json.load(file_in))
+
+        self.file_mode: int = get_file_mode()
+
+    def write(self, filename: str, text: str) -> None:
+        """Writes `text` to the file `filename` in the output directory, unless the
+        file already has this content."""
+        self.filenames.add(filename)
+        path: str = os.path.join(self.dirpath, filename)
+        if not os.path.isfile(path):
+            LOGGER.debug("Creating file " + path)
+            self._replace(path, text, self.file_mode)
+            self.report.created += 1
+        elif _read(path) == text:
+            self.report.unchanged += 1
+        else:
+            LOGGER.debug("Updating file " + path)
+            self._replace(path, text, os.stat(path).st_mode & 0o777)
+            self.report.updated += 1
+
+    def link(self, filename: str, source_path: str) -> None:
+        """Makes the file `filename` in the output directory a hard link to the file
+        at `source_path`, unless it already is one. Writes a copy instead if the file
+        system doesn't support hard links.
+
+        Writing the file later replaces it with a new file, so the source keeps its
+        content."""
+        self.filenames.add(filename)
+        path: str = os.path.join(self.dirpath, filename)
+        exists: bool = os.path.isfile(path)
+        if exists and os.path.samefile(path, source_path):
+            self.report.unchanged += 1
+            return
+
+        dirpath, basename = os.path.split(path)
+        temporary_path: str = os.path.join(dirpath, "." + basename + ".link")
+        try:
+            if os.path.lexists(temporary_path):
+                os.remove(temporary_path)
+            os.link(source_path, temporary_path)
+            os.replace(temporary_path, path)
+        except OSError as error:
+            LOGGER.debug("Could not link {}, copying it: {}".format(path, error))
+            with open(source_path, "r") as file_in:
+                self.write(filename, file_in.read())
+            return
+        LOGGER.debug("Linking file {} to {}".format(path, source_path))
+        if exists:
+            self.report.updated += 1
+        else:
+            self.report.created += 1
+
+    def keep(self, filename: str) -> None:
+        """Marks an existing file as generated during this run, without writing it."""
+        self.filenames.add(filename)
+        self.report.unchanged += 1
+
+    def finish(self) -> SyncReport:
+        """Deletes the files generated by the previous run but not by this one, saves
+        the manifest, and returns the report."""
+        for filename in sorted(self.previous_filenames - self.filenames):
+            path: str = os.path.join(self.dirpath, filename)
+            if os.path.isfile(path):
+                LOGGER.debug("Deleting stale file " + path)
+                os.remove(path)
+                self.report.deleted += 1
+
+        filenames: List[str] = sorted(self.filenames)
+        self._replace(
+            self.manifest_path, json.dumps(filenames, indent=0), self.file_mode
+        )
+        LOGGER.info("Synchronized {}: {}".format(self.dirpath, self.report))
+        return self.report
+
+    def _replace(self, path: str, text: str, mode: int) -> None:
+        """Writes `text` to a temporary file next to `path`, then renames it to `path`
+        so readers never see a partially written file."""
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            dir=os.path.dirname(path) or ".", prefix=".", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(file_descriptor, "w") as file_out:
+                file_out.write(text)
+            os.chmod(temporary_path, mode)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+
+def get_file_mode() -> int:
+    """Returns the permissions of new files, following the umask."""
+    # There is no way to read the umask without setting it.
+    umask: int = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, "r") as file_in:
+            return file_in.read()
+    except (OSError, UnicodeDecodeError):
+        return None
@@ -0,0 +1,192 @@
+"""Page layouts of the output formats, compiled once per run.
+
+A layout is a text with fields in braces, like `{title}`, in the syntax of Python's
+`str.format()`. The `{body}` field is required and marks where the class reference
+goes. The other fields are:
+
+- title: the title of the page.
+- name: the name of the class.
+- description: the description of the class.
+- author and date: the values of the --author and --date options.
+
+With the hugo format, all fields but the body are quoted TOML strings, for the front
+matter.
+
+Compiling a layout checks its fields and fills in the ones that are the same on every
+page, so rendering a page only formats the fields of its class. The --templates
+option points to a directory of layouts named after the formats, like `hugo.md`, that
+replace the default layouts.
+"""
+import os
+import string
+from argparse import Namespace
+from typing import Dict, List, Optional, Set, Tuple
+
+from .command_line import OutputFormats
+from .config import HUGO_FRONT_MATTER
+from .gdscript_objects import GDScriptClass
+from .hugo import quote_string
+from .make_markdown import escape_markdown, make_comment, surround_with_html
+
+AUTO_GENERATED_COMMENT: str = make_comment(
+    "Auto-generated from JSON by GDScript docs maker. "
+    "Do not edit this document directly."
+)
+LAYOUT_EXTENSION: str = ".md"
+BODY_FIELD: str = "body"
+# Fields that change from one page to the next.
+PAGE_FIELDS: Tuple[str, ...] = ("title", "name", "description")
+DEFAULT_LAYOUTS: Dict[OutputFormats, str] = {
+    OutputFormats.MARDKOWN: AUTO_GENERATED_COMMENT + "\n\n# {title}\n{body}",
+    OutputFormats.HUGO: HUGO_FRONT_MATTER["toml"].format(
+        "{title}", "{description}", "{author}", "{date}"
+    )
+    + "\n\n"
+    + AUTO_GENERATED_COMMENT
+    + "\n{body}",
+}
+
+# Layouts compiled during this run, by format and options.
+_layouts: Dict[tuple, "PageLayout"] = {}
+
+
+class PageLayout:
+    """A layout compiled for one run: the text before and after the body of pages,
+    with the run's fields filled in.
+
+    Arguments:
+
+    - text: the text of the layout.
+    - output_format: the format of the pages, which sets how to write field values.
+    - author, date: the values of the fields of the same name.
+    - path: the file the layout comes from, for error messages.
+
+    """
+
+    def __init__(
+        self,
+        text: str,
+        output_format: OutputFormats,
+        author: str,
+        date: str,
+        path: str = "",
+    ):
+        self.output_format: OutputFormats = output_format
+        self.path: str = path or "the default {} layout".format(output_format.value)
+        run_fields: Dict[str, str] = {"author": author, "date": date}
+        if output_format == OutputFormats.HUGO:
+            run_fields = {key: quote_string(value) for key, value in run_fields.items()}
+        # Page fields the layout uses.
+        self.fields: Set[str] = set()
+        self.header, self.footer = self._compile(text, run_fields)
+
+    def render(self, gdscript: GDScriptClass) -> Tuple[str, str]:
+        """Returns the text of the page of `gdscript` before and after its body."""
+        if not self.fields:
+            return self.header, self.footer
+        fields: Dict[str, str] = {
+            key: self._get_field(key, gdscript) for key in self.fields
+        }
+        return self.header.format_map(fields), self.footer.format_map(fields)
+
+    def _compile(self, text: str, run_fields: Dict[str, str]) -> Tuple[str, str]:
+        """Returns the parts of the layout before and after the body, as format
+        strings of the page fields."""
+        parts: List[str] = []
+        header: Optional[str] = None
+        try:
+            parsed: list = list(string.Formatter().parse(text))
+        except ValueError as error:
+            raise ValueError("Invalid layout {}: {}".format(self.path, error))
+        for literal, field_name, format_spec, conversion in parsed:
+            parts.append(_escape(literal))
+            if field_name is None:
+                continue
+            specification: str = ("!" + conversion if conversion else "") + (
+                ":" + format_spec if format_spec else ""
+            )
+            if field_name == BODY_FIELD:
+                if header is not None or specification:
+                    raise ValueError(
+                        "The layout {} must have a single {{body}} field.".format(
+                            self.path
+                        )
+                    )
+                header, parts = "".join(parts), []
+            elif field_name in run_fields:
+                value: str = ("{" + specification + "}").format(run_fields[field_name])
+                parts.append(_escape(value))
+            elif field_name in PAGE_FIELDS:
+                parts.append("{" + field_name + specification + "}")
+                self.fields.add(field_name)
+            else:
+                raise ValueError(
+                    "Unknown field {{{}}} in the layout {}. Use one of: {}.".format(
+                        field_name,
+                        self.path,
+                        ", ".join(PAGE_FIELDS + tuple(run_fields) + (BODY_FIELD,)),
+                    )
+                )
+        if header is None:
+            raise ValueError(
+                "The layout {} is missing the {{body}} field.".format(self.path)
+            )
+        return header, "".join(parts)
+
+    def _get_field(self, key: str, gdscript: GDScriptClass) -> str:
+        is_abstract: bool = "abstract" in gdscript.metadata.tags
+        if self.output_format == OutputFormats.HUGO:
+            value: str = gdscript.name
+            if key == "title" and is_abstract:
+                value += " (abstract)"
+            elif key == "description":
+                value = gdscript.description.replace("\n", "\\n")
+            return quote_string(value)
+
+        if key == "title":
+            title: str = gdscript.name
+            if is_abstract:
+                title += " " + surround_with_html("(abstract)", "small")
+            return escape_markdown(title)
+        return gdscript.description if key == "description" else gdscript.name
+
+
+def get_layout(
+    arguments: Namespace, output_format: Optional[OutputFormats] = None
+) -> PageLayout:
+    """Returns the layout of `output_format`, or of the first output format set in
+    the command line `arguments`, compiling it on the first call with these
+    arguments."""
+    output_format = output_format or arguments.format
+    key: tuple = (
+        output_format,
+        arguments.templates,
+        arguments.author,
+        arguments.date,
+    )
+    layout: Optional[PageLayout] = _layouts.get(key)
+    if layout is None:
+        path: str = ""
+        text: str = DEFAULT_LAYOUTS[output_format]
+        if arguments.templates:
+            user_path: str = os.path.join(
+                arguments.templates, output_format.value + LAYOUT_EXTENSION
+            )
+            if os.path.isfile(user_path):
+                path = user_path
+                with open(path, "r") as file_in:
+                    text = file_in.read()
+        layout = PageLayout(
+            text,
+            output_format,
+            arguments.author,
+            "{:%Y-%m-%d}".format(arguments.date),
+            path,
+        )
+        _layouts[key] = layout
+    return layout
+
+
+def _escape(text: str) -> str:
+    """Escapes the braces of `text` to use it in a format string."""
+    return text.replace("{", "{{").replace("}", "}}")
@@ -1,4 +1,9 @@
 """Generic utility functions for GDScript docs maker."""
+import gc
+from contextlib import contextmanager
+from typing import Iterator
+
+import pkg_resources
 
 
 def build_re_pattern(tag_name: str) -> str:
@@ -6,3 +11,28 @@ def build_re_pattern(tag_name: str) -> str:
     or @tag_name - value
     The match pattern has a match group for the value."""
     return "^@{} ?-? ?(.+)?".format(tag_name)
+
+
+def get_version() -> str:
+    """Returns the version of the installed program, or "unknown" when running from
+    the sources."""
+    try:
+        return pkg_resources.get_distribution("gdscript-docs-maker").version
+    except pkg_resources.DistributionNotFound:
+        return "unknown"
+
+
+@contextmanager
+def paused_gc() -> Iterator[None]:
+    """Disables the cyclic garbage collector for the duration of the context.
+
+    Decoding reference files and building the objects allocate millions of objects
+    without reference cycles, which triggers full collections that take most of the
+    loading time."""
+    was_enabled: bool = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
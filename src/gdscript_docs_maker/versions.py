@@ -0,0 +1,270 @@
+"""Converts several versions of a project in one run, for the --versions option,
+rendering and storing the pages that several versions share once.
+
+Every file argument has the form LABEL=PATH, and the pages of each version go to a
+subdirectory of the output named after its label.
+
+The page of a class only depends on the source of the class, on the sources of the
+classes it depends on, like with --incremental, and with --reverse-references on the
+classes that inherit from and link to it. The hash of all of them is the key of the
+page: a class whose key appeared in a previous version is not converted again.
+
+Classes whose source is the same as in the previous version aren't built again, and
+the classes their descriptions link to are found once per source.
+
+Identical pages are stored once, by the hash of their content: the first version
+with a page writes it, and the next versions get a hard link to that file. Pages
+that can't be linked, for example on file systems without hard links, are copied.
+"""
+import copy
+import hashlib
+import json
+import os
+from argparse import Namespace
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from . import parallel, reference_file
+from .config import LOGGER
+from .convert_to_markdown import convert_index_to_documents, get_format_directories
+from .cross_references import iter_referenced_classes
+from .gdscript_objects import (
+    GDScriptClass,
+    GDScriptClasses,
+    ProjectInfo,
+    ReverseReferences,
+)
+from .sync import OutputSync
+from .utils import paused_gc
+
+LABEL_SEPARATOR: str = "="
+
+# The source of a class, as returned by `reference_file.read_sources()`.
+Source = Union[bytes, dict]
+
+
+@dataclass
+class VersionsReport:
+    versions: int = 0
+    pages: int = 0
+    # Pages identical to a page of a previous version, stored once.
+    deduplicated: int = 0
+    converted_classes: int = 0
+    reused_classes: int = 0
+
+    def __str__(self) -> str:
+        return (
+            "{} versions, {} pages: {} deduplicated, {} unique. Converted {} classes,"
+            " reused {} from previous versions.".format(
+                self.versions,
+                self.pages,
+                self.deduplicated,
+                self.pages - self.deduplicated,
+                self.converted_classes,
+                self.reused_classes,
+            )
+        )
+
+
+def split_label(argument: str) -> Tuple[str, str]:
+    """Returns the label and the path of a LABEL=PATH file argument."""
+    label, separator, path = argument.partition(LABEL_SEPARATOR)
+    if not separator or not label or not path:
+        raise ValueError(
+            "With --versions, files must have the form LABEL=PATH, got {}.".format(
+                argument
+            )
+        )
+    if label != os.path.basename(label) or label.startswith("."):
+        raise ValueError("Invalid version label {}.".format(label))
+    return label, path
+
+
+def get_page_key(
+    classes: GDScriptClasses,
+    gdscript: GDScriptClass,
+    dependencies: Set[str],
+    references: Optional[ReverseReferences] = None,
+) -> str:
+    """Returns a hash of everything the page of `gdscript` depends on, given
+    `dependencies`, the names of the classes it depends on as returned by
+    `incremental.get_dependencies()`. The classes must have their `source_hash`
+    set."""
+    sha1 = hashlib.sha1(gdscript.source_hash.encode("utf-8"))
+    for name in sorted(dependencies):
+        dependency: Optional[GDScriptClass] = classes.get_class(name)
+        source_hash: str = dependency.source_hash if dependency else ""
+        sha1.update("\n{}:{}".format(name, source_hash).encode("utf-8"))
+    if references is not None:
+        for names in [
+            references.get_inherited_by(gdscript.name),
+            references.get_referenced_by(gdscript.name),
+        ]:
+            sha1.update("\n{}".format(",".join(names)).encode("utf-8"))
+    return sha1.hexdigest()
+
+
+class VersionedBuild:
+    """Converts versions of a project one after the other, remembering the pages of
+    the previous versions.
+
+    Arguments:
+
+    - arguments: command line arguments. The versions go to subdirectories of the
+      `path` directory, unless `dry_run` is set.
+
+    """
+
+    def __init__(self, arguments: Namespace):
+        self.arguments: Namespace = arguments
+        # Converting the classes that are new in a version shouldn't output the index,
+        # which depends on all the classes.
+        self.class_arguments: Namespace = copy.copy(arguments)
+        self.class_arguments.make_index = False
+        self.report: VersionsReport = VersionsReport()
+        # Maps page keys to the filename and content hash of each of their documents.
+        self.pages: Dict[str, List[Tuple[str, str]]] = {}
+        # Maps content hashes to the first file saved with this content.
+        self.files: Dict[str, str] = {}
+        # Source and class of every class of the previous version, by line for
+        # newline-delimited JSON and shards, and by name for JSON.
+        self.sources: Dict[Union[bytes, str], Tuple[Source, GDScriptClass]] = {}
+        # Maps source hashes to the classes that the descriptions link to.
+        self.referenced: Dict[str, Set[str]] = {}
+
+    def convert(self, label: str, path: str) -> None:
+        """Converts the reference file at `path` to the subdirectory `label`."""
+        info, classes = self._load(path)
+        LOGGER.info("Version {}: {} classes in {}".format(label, len(classes), path))
+        references: Optional[ReverseReferences] = (
+            classes.get_reverse_references()
+            if self.arguments.reverse_references
+            else None
+        )
+        keys: Dict[str, str] = {
+            gdscript.name: get_page_key(
+                classes, gdscript, self._get_dependencies(classes, gdscript), references
+            )
+            for gdscript in classes
+        }
+        selection: List[GDScriptClass] = [
+            gdscript for gdscript in classes if keys[gdscript.name] not in self.pages
+        ]
+        self.report.versions += 1
+        self.report.converted_classes += len(selection)
+        self.report.reused_classes += len(classes) - len(selection)
+
+        dirpath: str = os.path.join(self.arguments.path, label)
+        output: Optional[OutputSync] = None
+        if not self.arguments.dry_run:
+            for _, dirname in get_format_directories(self.arguments):
+                os.makedirs(os.path.join(dirpath, dirname), exist_ok=True)
+            output = OutputSync(dirpath)
+
+        if self.arguments.make_index:
+            for document in convert_index_to_documents(classes, info, self.arguments):
+                self._save(
+                    output, dirpath, document.get_filename(), document.as_string()
+                )
+
+        for document in parallel.iter_markdown(
+            classes, self.class_arguments, info, selection, self.arguments.jobs
+        ):
+            filename: str = document.get_filename()
+            digest: str = self._save(output, dirpath, filename, document.as_string())
+            name: str = document.title.rsplit("/", 1)[-1]
+            self.pages.setdefault(keys[name], []).append((filename, digest))
+
+        converted: Set[str] = {gdscript.name for gdscript in selection}
+        for gdscript in classes:
+            if gdscript.name in converted:
+                continue
+            for filename, digest in self.pages[keys[gdscript.name]]:
+                self.report.pages += 1
+                self.report.deduplicated += 1
+                if output is not None:
+                    output.link(filename, self.files[digest])
+
+        if output is not None:
+            output.finish()
+
+    def _load(self, path: str) -> Tuple[ProjectInfo, GDScriptClasses]:
+        """Loads the reference file at `path`, reusing the classes of the previous
+        version whose source didn't change, and sets the `source_hash` of the
+        classes."""
+        header, sources = reference_file.read_sources(path)
+        loaded: Dict[Union[bytes, str], Tuple[Source, GDScriptClass]] = {}
+        gdscripts: List[GDScriptClass] = []
+        with paused_gc():
+            for source in sources:
+                key: Union[bytes, str] = (
+                    source if isinstance(source, bytes) else source.get("name", "")
+                )
+                previous: Optional[Tuple[Source, GDScriptClass]] = self.sources.get(key)
+                if previous is not None and previous[0] == source:
+                    gdscript: GDScriptClass = previous[1]
+                else:
+                    data: dict = (
+                        json.loads(source) if isinstance(source, bytes) else source
+                    )
+                    if "name" not in data:
+                        continue
+                    gdscript = GDScriptClass.from_dict(data)
+                    gdscript.source_hash = reference_file.hash_class_data(data)
+                loaded[key] = (source, gdscript)
+                gdscripts.append(gdscript)
+        self.sources = loaded
+        return ProjectInfo.from_dict(header), GDScriptClasses(gdscripts)
+
+    def _get_dependencies(
+        self, classes: GDScriptClasses, gdscript: GDScriptClass
+    ) -> Set[str]:
+        """Like `incremental.get_dependencies()`, finding the classes that the
+        descriptions link to once per source."""
+        referenced: Optional[Set[str]] = self.referenced.get(gdscript.source_hash)
+        if referenced is None:
+            referenced = set()
+            for description in gdscript.iter_descriptions():
+                referenced.update(iter_referenced_classes(description))
+            self.referenced[gdscript.source_hash] = referenced
+        dependencies: Set[str] = set(gdscript.get_extends_tree(classes)) | referenced
+        dependencies.discard(gdscript.name)
+        return dependencies
+
+    def _save(
+        self, output: Optional[OutputSync], dirpath: str, filename: str, text: str
+    ) -> str:
+        """Saves a page to `dirpath`, or links it to a saved page with the same
+        content, and returns the hash of its content."""
+        digest: str = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        source_path: Optional[str] = self.files.get(digest)
+        self.report.pages += 1
+        if source_path is None:
+            self.files[digest] = os.path.join(dirpath, filename)
+        else:
+            self.report.deduplicated += 1
+        if output is None:
+            LOGGER.debug("Generated " + filename)
+        elif source_path is None:
+            output.write(filename, text)
+        else:
+            output.link(filename, source_path)
+        return digest
+
+
+def convert_versions(arguments: Namespace) -> VersionsReport:
+    """Converts every LABEL=PATH file argument to the subdirectory LABEL of the
+    output and returns the report of the run."""
+    # Like without --versions, skips the other arguments, like the program's path.
+    versions: List[Tuple[str, str]] = [
+        split_label(f)
+        for f in arguments.files
+        if LABEL_SEPARATOR in f or reference_file.is_reference_file(f)
+    ]
+    build: VersionedBuild = VersionedBuild(arguments)
+    for label, path in versions:
+        if not reference_file.is_reference_file(path):
+            LOGGER.warning("Skipping {}, which is not a reference file.".format(path))
+            continue
+        build.convert(label, path)
+    return build.report
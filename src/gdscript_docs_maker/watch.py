@@ -0,0 +1,253 @@
+"""Keeps the classes and pages of reference files in memory and updates them when the
+files change, for the --watch option.
+
+When a file changes, the watcher reads it again but only builds the classes whose
+source changed. It converts these classes and the classes whose pages depend on them,
+then only writes the pages whose text changed. Newline-delimited JSON files and shard
+directories update the fastest, as the watcher only decodes the lines or shards that
+changed.
+"""
+import json
+import os
+import time
+from argparse import Namespace
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from . import reference_file, sync
+from .config import LOGGER
+from .convert_to_markdown import (
+    convert_class_to_documents,
+    convert_index_to_documents,
+    get_format_directories,
+)
+from .gdscript_objects import GDScriptClass, GDScriptClasses, ProjectInfo
+from .incremental import get_dependencies
+from .make_markdown import MarkdownDocument
+from .utils import paused_gc
+
+# Seconds between two checks of the modification time of the watched files.
+POLL_INTERVAL: float = 0.25
+
+
+@dataclass
+class _Project:
+    """The classes and pages converted from one reference file."""
+
+    info: ProjectInfo
+    classes: GDScriptClasses = field(default_factory=lambda: GDScriptClasses([]))
+    # Source of every class by name, as returned by `reference_file.read_sources()`.
+    sources: Dict[str, Union[bytes, dict]] = field(default_factory=dict)
+    # Names of the classes of newline-delimited JSON lines.
+    names_by_line: Dict[bytes, str] = field(default_factory=dict)
+    dependencies: Dict[str, Set[str]] = field(default_factory=dict)
+    # Filename and text of the pages of every class, one per output format.
+    pages: Dict[str, List[Tuple[str, str]]] = field(default_factory=dict)
+    index_pages: List[Tuple[str, str]] = field(default_factory=list)
+
+    def find_class(self, source: Union[bytes, dict]) -> Optional[GDScriptClass]:
+        """Returns the class built from `source` if it's unchanged, or `None`."""
+        name: Optional[str] = (
+            self.names_by_line.get(source)
+            if isinstance(source, bytes)
+            else source.get("name")
+        )
+        if name is None or self.sources.get(name) != source:
+            return None
+        return self.classes.get_class(name)
+
+    def add_class(self, gdscript: GDScriptClass, source: Union[bytes, dict]) -> None:
+        self.sources[gdscript.name] = source
+        if isinstance(source, bytes):
+            self.names_by_line[source] = gdscript.name
+
+    def iter_pages(self) -> Iterator[Tuple[str, str]]:
+        yield from self.index_pages
+        for pages in self.pages.values():
+            yield from pages
+
+
+class Watcher:
+    """Converts reference files, and converts them again when they change, keeping
+    their classes and pages in memory in between.
+
+    Arguments:
+
+    - arguments: command line arguments. The pages go to the `path` directory.
+
+    """
+
+    def __init__(self, arguments: Namespace):
+        self.arguments: Namespace = arguments
+        self.projects: Dict[str, _Project] = {}
+        # Pages whose text changed since the last call to save().
+        self.changed_filenames: Set[str] = set()
+
+    def run(self, paths: List[str], interval: float = POLL_INTERVAL) -> None:
+        """Converts the files at `paths`, then checks them for changes every
+        `interval` seconds until the user presses Ctrl+C."""
+        stamps: Dict[str, Optional[Tuple[int, int]]] = {
+            path: _get_stamp(path) for path in paths
+        }
+        for path in paths:
+            self.update(path)
+        self.save()
+        LOGGER.info(
+            "Watching {} for changes. Press Ctrl+C to stop.".format(", ".join(paths))
+        )
+
+        try:
+            while True:
+                time.sleep(interval)
+                changed_paths: List[str] = []
+                for path in paths:
+                    stamp: Optional[Tuple[int, int]] = _get_stamp(path)
+                    if stamp is not None and stamp != stamps[path]:
+                        stamps[path] = stamp
+                        changed_paths.append(path)
+                if changed_paths:
+                    self._refresh(changed_paths)
+        except KeyboardInterrupt:
+            pass
+
+    def update(self, path: str) -> int:
+        """Reads the reference file at `path` again, and converts the classes that
+        changed and the classes whose pages depend on them. Returns the number of
+        pages that changed, were added, or were removed."""
+        header, sources = reference_file.read_sources(path)
+        previous: _Project = self.projects.get(path) or _Project(
+            ProjectInfo("", "", "")
+        )
+        project: _Project = _Project(ProjectInfo.from_dict(header))
+
+        gdscripts: List[GDScriptClass] = []
+        changed: Set[str] = set()
+        with paused_gc():
+            for source in sources:
+                gdscript: Optional[GDScriptClass] = previous.find_class(source)
+                if gdscript is None:
+                    data: dict = (
+                        json.loads(source) if isinstance(source, bytes) else source
+                    )
+                    if "name" not in data:
+                        continue
+                    gdscript = GDScriptClass.from_dict(data)
+                    changed.add(gdscript.name)
+                gdscripts.append(gdscript)
+                project.add_class(gdscript, source)
+        changed.update(previous.sources.keys() - project.sources.keys())
+        project.classes = GDScriptClasses(gdscripts)
+
+        # Pages that list the classes inheriting from or linking to them also depend
+        # on the classes whose dependencies they are, before and after the change.
+        referenced: Set[str] = set()
+        if self.arguments.reverse_references:
+            for changed_name in changed:
+                referenced.update(previous.dependencies.get(changed_name, set()))
+            for gdscript in project.classes:
+                if gdscript.name in changed:
+                    referenced.update(get_dependencies(project.classes, gdscript))
+
+        for gdscript in project.classes:
+            name: str = gdscript.name
+            dependencies: Set[str] = previous.dependencies.get(name, set())
+            if name in previous.pages and not (
+                name in changed
+                or name in referenced
+                or not changed.isdisjoint(dependencies)
+            ):
+                project.dependencies[name] = dependencies
+                project.pages[name] = previous.pages[name]
+                continue
+            project.dependencies[name] = get_dependencies(project.classes, gdscript)
+            project.pages[name] = _render(
+                convert_class_to_documents(project.classes, gdscript, self.arguments)
+            )
+
+        project.index_pages = previous.index_pages
+        if self.arguments.make_index and (changed or project.info != previous.info):
+            project.index_pages = _render(
+                convert_index_to_documents(
+                    project.classes, project.info, self.arguments
+                )
+            )
+
+        self.projects[path] = project
+        pages: Dict[str, str] = dict(project.iter_pages())
+        previous_pages: Dict[str, str] = dict(previous.iter_pages())
+        changed_filenames: Set[str] = {
+            filename
+            for filename in pages.keys() | previous_pages.keys()
+            if pages.get(filename) != previous_pages.get(filename)
+        }
+        self.changed_filenames.update(changed_filenames)
+        return len(changed_filenames)
+
+    def save(self) -> None:
+        """Writes the pages that changed since the last call, and deletes the pages
+        of classes that no longer exist."""
+        if self.arguments.dry_run:
+            for filename in sorted(self.changed_filenames):
+                LOGGER.debug("Generated " + filename)
+            self.changed_filenames.clear()
+            return
+
+        for _, dirname in get_format_directories(self.arguments):
+            os.makedirs(os.path.join(self.arguments.path, dirname), exist_ok=True)
+        output: sync.OutputSync = sync.OutputSync(self.arguments.path)
+        for project in self.projects.values():
+            for filename, text in project.iter_pages():
+                if filename in self.changed_filenames:
+                    output.write(filename, text)
+                else:
+                    output.keep(filename)
+        output.finish()
+        self.changed_filenames.clear()
+
+    def _refresh(self, paths: List[str]) -> None:
+        start: float = time.perf_counter()
+        count: int = 0
+        for path in paths:
+            try:
+                count += self.update(path)
+            except (OSError, ValueError, KeyError) as error:
+                # The file may be incomplete if it's still being written.
+                LOGGER.warning(
+                    "Could not read {}, keeping its previous version: {}".format(
+                        path, error
+                    )
+                )
+        self.save()
+        LOGGER.info(
+            "Updated {} pages in {:.3f}s".format(count, time.perf_counter() - start)
+        )
+
+
+def _render(documents: List[MarkdownDocument]) -> List[Tuple[str, str]]:
+    return [(document.get_filename(), document.as_string()) for document in documents]
+
+
+def _get_stamp(path: str) -> Optional[Tuple[int, int]]:
+    """Returns the modification time and size of the file at `path`, or `None` if the
+    file doesn't exist, for example while it's being replaced. For shard directories,
+    returns the latest modification time and the total size of the files, so adding
+    or removing a shard also changes the stamp."""
+    if not os.path.isdir(path):
+        try:
+            stat: os.stat_result = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    paths: List[str] = reference_file.get_shard_paths(path)
+    paths.append(os.path.join(path, reference_file.SHARDS_PROJECT_FILENAME))
+    modified: int = 0
+    size: int = 0
+    for file_path in paths:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        modified = max(modified, stat.st_mtime_ns)
+        size += stat.st_size
+    return modified, size